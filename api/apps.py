@@ -3,5 +3,6 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
-#Hi
-#bye
\ No newline at end of file
+
+    def ready(self):
+        import api.signals
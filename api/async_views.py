@@ -0,0 +1,181 @@
+import math
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Paginator
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, Throttled, ValidationError
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from products.cache import aget_catalog_version, catalog_last_modified
+from products.models import Product
+from .cache import (
+    arecord_response_cache_hit,
+    arecord_response_cache_miss,
+    make_response_cache_key,
+    normalize_query_params,
+)
+from .mixins import make_validators
+from .renderers import FastJSONRenderer
+from .views import ProductViewSet
+
+renderer = FastJSONRenderer()
+
+
+def _json_response(data, status=200):
+    return HttpResponse(renderer.render(data), content_type=renderer.media_type, status=status)
+
+
+def _product_view(request, action, **kwargs):
+    # The viewset is used only to build querysets and serializer context,
+    # so filtering, ordering and field selection match the sync API.
+    view = ProductViewSet(action=action, basename='product', format_kwarg=None, args=(), kwargs=kwargs)
+    view.request = Request(
+        request,
+        authenticators=view.get_authenticators(),
+        negotiator=view.get_content_negotiator(),
+        parsers=view.get_parsers(),
+    )
+    return view
+
+
+async def _authenticate(view):
+    # Token users may be loaded from the database, and session users always
+    # are, so authentication runs in the sync thread.
+    try:
+        await sync_to_async(view.perform_authentication)(view.request)
+    except (AuthenticationFailed, NotAuthenticated) as exc:
+        response = _json_response({'detail': exc.detail}, status=exc.status_code)
+        auth_header = view.get_authenticate_header(view.request)
+        if auth_header:
+            response['WWW-Authenticate'] = auth_header
+        else:
+            response.status_code = 403
+        return response
+    return None
+
+
+async def _check_throttles(view):
+    # Throttle stores may be cache-backed, so they run in the sync thread too.
+    try:
+        await sync_to_async(view.check_throttles)(view.request)
+    except Throttled as exc:
+        response = _json_response({'detail': exc.detail}, status=exc.status_code)
+        if exc.wait is not None:
+            response['Retry-After'] = '%d' % math.ceil(exc.wait)
+        return response
+    return None
+
+
+def _with_validators(response, etag, last_modified):
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+async def _product_page(request, view):
+    try:
+        # FuzzySearchFilter runs queries of its own while filtering.
+        queryset = await sync_to_async(view.filter_queryset)(view.get_queryset())
+    except ValidationError as exc:
+        return _json_response(exc.detail, status=400)
+
+    serializer = view.get_values_serializer()
+    rows = serializer.values(queryset)
+    paginator = Paginator(rows, api_settings.PAGE_SIZE)
+    paginator.count = await rows.acount()
+    try:
+        page = paginator.page(request.GET.get('page', 1))
+    except InvalidPage:
+        return _json_response({'detail': 'Invalid page.'}, status=404)
+
+    # Loads the page's categories in the sync thread, like any async ORM call.
+    data = await sync_to_async(serializer.serialize)([row async for row in page.object_list])
+
+    url = request.build_absolute_uri()
+    next_url = previous_url = None
+    if page.has_next():
+        next_url = replace_query_param(url, 'page', page.next_page_number())
+    if page.has_previous():
+        number = page.previous_page_number()
+        previous_url = remove_query_param(url, 'page') if number == 1 else replace_query_param(url, 'page', number)
+
+    return _json_response({
+        'count': paginator.count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': data,
+    })
+
+
+@require_safe
+async def product_list(request):
+    view = _product_view(request, 'list')
+    rejected = await _authenticate(view)
+    if rejected is None:
+        rejected = await _check_throttles(view)
+    if rejected is not None:
+        return rejected
+    if view.has_volatile_ordering():
+        return await _product_page(request, view)
+
+    version = await aget_catalog_version()
+    etag, last_modified = make_validators(request, catalog_last_modified(version), version)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _with_validators(response, etag, last_modified)
+
+    key = None
+    if not view.request.user.is_authenticated:
+        params = normalize_query_params(request.GET, view.cache_query_params)
+        if params is not None:
+            key = make_response_cache_key(view.basename, version, request, renderer.format, params)
+
+    if key is not None:
+        cached = await cache.aget(key)
+        if cached is not None:
+            await arecord_response_cache_hit()
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return _with_validators(response, etag, last_modified)
+        await arecord_response_cache_miss()
+
+    response = await _product_page(request, view)
+    if key is not None and response.status_code == 200:
+        await cache.aset(
+            key, (response.content, response['Content-Type']), settings.API_RESPONSE_CACHE_TIMEOUT
+        )
+        response['X-Cache'] = 'MISS'
+    return _with_validators(response, etag, last_modified)
+
+
+@require_safe
+async def product_detail(request, slug):
+    view = _product_view(request, 'retrieve', slug=slug)
+    rejected = await _authenticate(view)
+    if rejected is None:
+        rejected = await _check_throttles(view)
+    if rejected is not None:
+        return rejected
+    state_queryset = view.get_state_queryset().filter(slug=slug)
+    last_modified, state = await view.aget_detail_state(state_queryset)
+    etag, last_modified = make_validators(request, last_modified, state)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _with_validators(response, etag, last_modified)
+
+    try:
+        product = await view.get_queryset().aget(slug=slug)
+    except Product.DoesNotExist:
+        return _json_response({'detail': 'No Product matches the given query.'}, status=404)
+
+    serializer = view.get_serializer_class()(product, context=view.get_serializer_context())
+    return _with_validators(_json_response(serializer.data), etag, last_modified)
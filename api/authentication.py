@@ -0,0 +1,130 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+TOKEN_SALT = 'api.token'
+TOKEN_KEYWORD = 'Bearer'
+
+
+def get_token_version(user):
+    try:
+        return user.profile.token_version
+    except User.profile.RelatedObjectDoesNotExist:
+        return 0
+
+
+def make_token(user):
+    """Returns a signed token for ``user``; it is checked without a DB lookup."""
+    return signing.dumps(
+        {'u': user.pk, 'v': get_token_version(user)}, salt=TOKEN_SALT, compress=False
+    )
+
+
+class PrincipalCache:
+    """
+    Per-process cache of active users (with their profile) keyed by pk.
+
+    Entries live for ``API_TOKEN_USER_CACHE_TTL`` seconds, which bounds how
+    long a revoked token or a deactivated user can still authenticate on
+    other processes; saving a user or profile evicts it in this one
+    (``api.signals``). Each hit returns a copy of the user and its profile,
+    so per-request state set on them is not shared.
+    """
+
+    def __init__(self, max_size=10_000):
+        self.max_size = max_size
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, pk):
+        entry = self.entries.get(pk)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return self.copy_user(entry[1])
+
+    def copy_user(self, cached):
+        user = copy.copy(cached)
+        profile = cached._state.fields_cache.get('profile')
+        if profile is not None:
+            user.profile = copy.copy(profile)
+        return user
+
+    def set(self, pk, user):
+        with self.lock:
+            if len(self.entries) >= self.max_size:
+                self.entries.clear()
+            self.entries[pk] = (time.monotonic() + settings.API_TOKEN_USER_CACHE_TTL, self.copy_user(user))
+
+    def discard(self, pk):
+        self.entries.pop(pk, None)
+
+
+principal_cache = PrincipalCache()
+
+
+def get_token_user(pk):
+    user = principal_cache.get(pk)
+    if user is None:
+        user = User.objects.select_related('profile').filter(pk=pk, is_active=True).first()
+        if user is None:
+            return None
+        principal_cache.set(pk, user)
+    return user
+
+
+def revoke_tokens(user):
+    """Invalidates every token issued to ``user`` so far."""
+    from users.models import UserProfile
+
+    UserProfile.objects.get_or_create(user=user)
+    UserProfile.objects.filter(user=user).update(
+        token_version=F('token_version') + 1, updated_at=timezone.now()
+    )
+    principal_cache.discard(user.pk)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    ``Authorization: Bearer <token>`` with tokens from :func:`make_token`.
+
+    The signature and expiry are verified locally and the user comes from
+    :data:`principal_cache`, so a cache hit costs no database queries.
+    """
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != TOKEN_KEYWORD.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            payload = signing.loads(
+                auth[1].decode(), salt=TOKEN_SALT, max_age=settings.API_TOKEN_MAX_AGE
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Token has expired.')
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        user = get_token_user(payload['u'])
+        if user is not None and payload['v'] > get_token_version(user):
+            # Issued after a revocation this process has not seen yet.
+            principal_cache.discard(user.pk)
+            user = get_token_user(payload['u'])
+        if user is None:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        if payload['v'] != get_token_version(user):
+            raise exceptions.AuthenticationFailed('Token has been revoked.')
+        return user, payload
+
+    def authenticate_header(self, request):
+        return TOKEN_KEYWORD
@@ -0,0 +1,144 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from products.cache import get_catalog_version
+
+RESPONSE_CACHE_PREFIX = 'api:response'
+RESPONSE_CACHE_HITS_KEY = 'api:response:hits'
+RESPONSE_CACHE_MISSES_KEY = 'api:response:misses'
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+async def _aincr(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, None):
+            await cache.aincr(key)
+
+
+def get_response_cache_stats():
+    hits = cache.get(RESPONSE_CACHE_HITS_KEY, 0)
+    misses = cache.get(RESPONSE_CACHE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0,
+        'catalog_version': get_catalog_version(),
+    }
+
+
+def reset_response_cache_stats():
+    cache.delete_many([RESPONSE_CACHE_HITS_KEY, RESPONSE_CACHE_MISSES_KEY])
+
+
+def normalize_query_params(query_params, allowed):
+    """
+    Returns sorted, normalized (name, value) pairs, or None when the query
+    string contains a parameter outside ``allowed``.
+    """
+    params = {}
+    for name, values in query_params.lists():
+        if name not in allowed:
+            return None
+        value = ' '.join(values[-1].split())
+        if name == 'search':
+            value = value.lower()
+        elif name == 'fields':
+            value = ','.join(sorted(set(filter(None, value.replace(' ', '').split(',')))))
+        if value and not (name == 'page' and value == '1'):
+            params[name] = value
+    return sorted(params.items())
+
+
+def make_response_cache_key(basename, version, request, renderer_format, params):
+    fingerprint = '|'.join((request.get_host(), renderer_format, urlencode(params)))
+    digest = hashlib.md5(fingerprint.encode()).hexdigest()
+    return f'{RESPONSE_CACHE_PREFIX}:{basename}:{version}:{digest}'
+
+
+def record_response_cache_hit():
+    _incr(RESPONSE_CACHE_HITS_KEY)
+
+
+def record_response_cache_miss():
+    _incr(RESPONSE_CACHE_MISSES_KEY)
+
+
+async def arecord_response_cache_hit():
+    await _aincr(RESPONSE_CACHE_HITS_KEY)
+
+
+async def arecord_response_cache_miss():
+    await _aincr(RESPONSE_CACHE_MISSES_KEY)
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Caches rendered ``list`` responses for anonymous users.
+
+    Keys are built from the normalized filter, ordering and page parameters
+    plus the catalog version, so any catalog write makes old entries
+    unreachable instead of requiring explicit invalidation.
+    """
+    cache_query_params = ('search', 'ordering', 'category', 'is_featured', 'page')
+    cache_renderer_formats = ('json', 'msgpack')
+
+    def get_cache_timeout(self):
+        return getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 300)
+
+    def normalize_cache_params(self, request):
+        return normalize_query_params(request.query_params, self.cache_query_params)
+
+    def get_response_cache_key(self, request):
+        params = self.normalize_cache_params(request)
+        if params is None:
+            return None
+        return make_response_cache_key(
+            self.basename, get_catalog_version(), request, request.accepted_renderer.format, params
+        )
+
+    def is_response_cacheable(self, request):
+        return (
+            request.method == 'GET'
+            and not request.user.is_authenticated
+            and request.accepted_renderer.format in self.cache_renderer_formats
+        )
+
+    def list(self, request, *args, **kwargs):
+        key = None
+        if self.is_response_cacheable(request):
+            key = self.get_response_cache_key(request)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+
+        cached = cache.get(key)
+        if cached is not None:
+            record_response_cache_hit()
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        record_response_cache_miss()
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = self.get_cache_timeout()
+
+            def store(rendered):
+                cache.set(key, (rendered.content, rendered['Content-Type']), timeout)
+
+            response.add_post_render_callback(store)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,178 @@
+import csv
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.negotiation import BaseContentNegotiation
+from products.models import Product
+from orders.models import OrderItem
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+PRODUCT_EXPORT_COLUMNS = (
+    'id', 'slug', 'name', 'brand', 'size', 'color', 'material',
+    'price', 'discount_price', 'stock', 'is_featured', 'updated_at',
+)
+ORDER_EXPORT_COLUMNS = (
+    'id', 'order_number', 'user_id', 'status', 'payment_method', 'is_paid',
+    'total_amount', 'discount_amount', 'shipping_cost', 'final_amount',
+    'shipping_city', 'created_at', 'updated_at',
+)
+ORDER_ITEM_EXPORT_COLUMNS = ('product_id', 'product_name', 'quantity', 'price', 'subtotal')
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Exports pick their content type from ``?output=``, not the Accept header."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def get_export_options(request):
+    output = request.query_params.get('output', 'ndjson')
+    if output not in EXPORT_FORMATS:
+        raise ValidationError({'output': f"Expected one of: {', '.join(EXPORT_FORMATS)}."})
+    after = request.query_params.get('after', '0')
+    try:
+        after = int(after)
+    except ValueError:
+        raise ValidationError({'after': 'Expected the id of the last exported row.'})
+    return output, after
+
+
+def iter_chunks(queryset, after, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields lists of rows ordered by primary key using keyset pagination.
+
+    Unlike ``QuerySet.iterator()``, this keeps memory bounded on MySQL too,
+    where the driver buffers the whole result set client side.
+    """
+    while True:
+        chunk = list(queryset.filter(pk__gt=after).order_by('pk')[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        after = chunk[-1]['id']
+        if len(chunk) < chunk_size:
+            return
+
+
+def iter_product_records(after):
+    queryset = Product.objects.filter(is_active=True).values(*PRODUCT_EXPORT_COLUMNS)
+    through = Product.categories.through.objects
+    for chunk in iter_chunks(queryset, after):
+        categories = {}
+        memberships = through.filter(
+            product_id__in=[row['id'] for row in chunk]
+        ).order_by('category__name').values_list('product_id', 'category__name')
+        for product_id, name in memberships:
+            categories.setdefault(product_id, []).append(name)
+
+        for row in chunk:
+            record = {column: _plain(value) for column, value in row.items()}
+            record['current_price'] = record['discount_price'] or record['price']
+            record['categories'] = categories.get(row['id'], [])
+            yield record
+
+
+def iter_order_records(queryset, after):
+    queryset = queryset.values(*ORDER_EXPORT_COLUMNS)
+    for chunk in iter_chunks(queryset, after):
+        items = {}
+        rows = OrderItem.objects.filter(
+            order_id__in=[row['id'] for row in chunk]
+        ).order_by('pk').values_list(
+            'order_id', 'product_id', 'product__name', 'quantity', 'price', 'subtotal'
+        )
+        for order_id, *values in rows:
+            items.setdefault(order_id, []).append(
+                {column: _plain(value) for column, value in zip(ORDER_ITEM_EXPORT_COLUMNS, values)}
+            )
+
+        for row in chunk:
+            record = {column: _plain(value) for column, value in row.items()}
+            record['items'] = items.get(row['id'], [])
+            yield record
+
+
+def iter_ndjson(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def product_csv_rows(records):
+    for record in records:
+        yield [record[column] for column in PRODUCT_EXPORT_COLUMNS] + [
+            record['current_price'],
+            '|'.join(record['categories']),
+        ]
+
+
+def order_csv_rows(records):
+    for record in records:
+        order = [record[column] for column in ORDER_EXPORT_COLUMNS]
+        if not record['items']:
+            yield order + [''] * len(ORDER_ITEM_EXPORT_COLUMNS)
+        for item in record['items']:
+            yield order + [item[column] for column in ORDER_ITEM_EXPORT_COLUMNS]
+
+
+def export_response(output, filename, records, csv_header, csv_rows):
+    if output == 'csv':
+        content = iter_csv(csv_header, csv_rows(records))
+    else:
+        content = iter_ndjson(records)
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
+
+
+def export_products(request):
+    output, after = get_export_options(request)
+    return export_response(
+        output,
+        'products',
+        iter_product_records(after),
+        PRODUCT_EXPORT_COLUMNS + ('current_price', 'categories'),
+        product_csv_rows,
+    )
+
+
+def export_orders(request, queryset):
+    output, after = get_export_options(request)
+    return export_response(
+        output,
+        'orders',
+        iter_order_records(queryset, after),
+        ORDER_EXPORT_COLUMNS + tuple(f'item_{column}' for column in ORDER_ITEM_EXPORT_COLUMNS),
+        order_csv_rows,
+    )
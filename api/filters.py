@@ -0,0 +1,38 @@
+import django_filters
+from rest_framework import filters
+from products.models import Product
+from products.trigrams import SEARCH_RANK, fuzzy_search
+
+
+class ProductFilter(django_filters.FilterSet):
+    category = django_filters.NumberFilter(field_name='categories')
+    min_price = django_filters.NumberFilter(field_name='effective_price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='effective_price', lookup_expr='lte')
+    min_discount = django_filters.NumberFilter(field_name='discount_percent', lookup_expr='gte')
+
+    class Meta:
+        model = Product
+        fields = ['category', 'is_featured', 'family']
+
+
+class FuzzySearchFilter(filters.SearchFilter):
+    """``SearchFilter`` that adds trigram matches when it finds too few products."""
+
+    def filter_queryset(self, request, queryset, view):
+        exact = super().filter_queryset(request, queryset, view)
+        terms = self.get_search_terms(request)
+        if not terms:
+            return exact
+        return fuzzy_search(queryset, exact, ' '.join(terms))
+
+
+class SearchRankOrderingFilter(filters.OrderingFilter):
+    """
+    ``OrderingFilter`` whose default ordering leaves the similarity order of
+    a fuzzy search in place; an explicit ``?ordering=`` still replaces it.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if SEARCH_RANK in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
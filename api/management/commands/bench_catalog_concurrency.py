@@ -0,0 +1,142 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.core.handlers.asgi import ASGIHandler
+from django.test import Client
+from rest_framework.views import APIView
+from api.throttling import get_bucket_store
+
+DEFAULT_PATHS = ['/', '/products/', '/api/v1/products/', '/api/v1/products/?page=2']
+
+
+class Command(BaseCommand):
+    help = (
+        'Replays catalog requests concurrently through the in-process WSGI or ASGI '
+        'handler. Run once with ASYNC_CATALOG_VIEWS off and once with it on.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', choices=('wsgi', 'asgi'), default='asgi')
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='WSGI worker threads, like a sync gunicorn deployment.',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.0,
+            help='Seconds each request holds its connection before it is handled (slow client).',
+        )
+        parser.add_argument('--path', action='append', dest='paths')
+        parser.add_argument('--host', default=None, help='Host header; defaults to the first ALLOWED_HOSTS entry.')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        allowed_hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '')]
+        options['host'] = options['host'] or (allowed_hosts[0].lstrip('.') if allowed_hosts else 'localhost')
+        # Every request comes from 127.0.0.1, so the per-IP buckets would
+        # answer 429 within a few hundred requests.
+        with mock.patch.object(APIView, 'get_throttles', lambda view: []):
+            try:
+                if options['server'] == 'wsgi':
+                    timings, elapsed = self.run_wsgi(paths, options)
+                else:
+                    timings, elapsed = asyncio.run(self.run_asgi(paths, options))
+            finally:
+                get_bucket_store().clear()
+
+        timings.sort()
+        self.stdout.write(
+            f"{options['server']} async_views={settings.ASYNC_CATALOG_VIEWS} "
+            f"concurrency={options['concurrency']} client_delay={options['client_delay']}s"
+        )
+        self.stdout.write(
+            f'  {len(timings) / elapsed:,.1f} req/s  '
+            f'p50 {statistics.median(timings) * 1000:,.1f} ms  '
+            f'p95 {timings[int(len(timings) * 0.95) - 1] * 1000:,.1f} ms'
+        )
+
+    def check_status(self, path, response):
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned {response.status_code}')
+
+    def run_wsgi(self, paths, options):
+        delay = options['client_delay']
+        host = options['host']
+
+        def fetch(index):
+            path = paths[index % len(paths)]
+            started = time.perf_counter()
+            # A sync worker is blocked for as long as the client takes.
+            time.sleep(delay)
+            try:
+                response = Client(HTTP_HOST=host).get(path)
+            finally:
+                close_old_connections()
+            self.check_status(path, response)
+            return time.perf_counter() - started
+
+        workers = min(options['workers'], options['concurrency'])
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            timings = list(pool.map(fetch, range(options['requests'])))
+        return timings, time.perf_counter() - started
+
+    async def run_asgi(self, paths, options):
+        delay = options['client_delay']
+        host = options['host']
+        handler = ASGIHandler()
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def fetch(index):
+            path, _, query = paths[index % len(paths)].partition('?')
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': query.encode(),
+                'root_path': '',
+                'headers': [(b'host', host.encode())],
+                'client': ('127.0.0.1', 50000 + index % 10000),
+                'server': (host, 80),
+            }
+            status = []
+            body_sent = False
+            finished = asyncio.Event()
+
+            async def receive():
+                nonlocal body_sent
+                if body_sent:
+                    await finished.wait()
+                    return {'type': 'http.disconnect'}
+                body_sent = True
+                # An event loop keeps serving other requests while this client is slow.
+                await asyncio.sleep(delay)
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif not message.get('more_body', False):
+                    finished.set()
+
+            async with semaphore:
+                started = time.perf_counter()
+                await handler(scope, receive, send)
+                if status[0] != 200:
+                    raise CommandError(f'{path} returned {status[0]}')
+                return time.perf_counter() - started
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(fetch(index) for index in range(options['requests'])))
+        return list(timings), time.perf_counter() - started
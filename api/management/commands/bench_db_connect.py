@@ -0,0 +1,91 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.urls import reverse
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the cost of opening a database connection and replays page '
+        'requests with CONN_MAX_AGE=0 and with the configured value.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--connects', type=int, default=50, help='Bare connects to time.')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Page to replay instead of the defaults. It must not write: the requests hit the live database.',
+        )
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--host', default=None, help='Host header; defaults to the first ALLOWED_HOSTS entry.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        configured = connection.settings_dict['CONN_MAX_AGE']
+        paths = options['paths'] or self.default_paths()
+        allowed_hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '')]
+        self.host = options['host'] or (allowed_hosts[0].lstrip('.') if allowed_hosts else 'localhost')
+
+        timings = []
+        for _ in range(options['connects']):
+            connection.close()
+            started = time.perf_counter()
+            connection.ensure_connection()
+            timings.append(time.perf_counter() - started)
+        connect_ms = statistics.median(timings) * 1000
+        self.stdout.write(
+            f"{connection.vendor} {connection.settings_dict.get('HOST') or 'local'}: "
+            f'connect p50 {connect_ms:,.2f} ms'
+        )
+
+        results = {}
+        for max_age in (0, configured):
+            results[max_age] = self.replay(connection, max_age, paths, options['requests'])
+            connects, p50 = results[max_age]
+            self.stdout.write(
+                f'  CONN_MAX_AGE={max_age}: {connects} connects for '
+                f"{options['requests']} requests, p50 {p50 * 1000:,.2f} ms/request"
+            )
+        connection.settings_dict['CONN_MAX_AGE'] = configured
+
+        saved = (results[0][1] - results[configured][1]) * 1000
+        self.stdout.write(self.style.SUCCESS(f'  saved {saved:,.2f} ms/request with connection reuse'))
+
+    def default_paths(self):
+        # Read-only pages only. The replay cannot run in a rolled-back
+        # transaction because it opens and closes connections, and product
+        # pages count views, score trending and write the session.
+        return [reverse('products:product_list'), '/api/v1/categories/']
+
+    def replay(self, connection, max_age, paths, requests):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        created = []
+
+        def count(sender, connection, **kwargs):
+            created.append(connection.alias)
+
+        connection_created.connect(count)
+        client = Client()
+        timings = []
+        try:
+            for index in range(requests):
+                path = paths[index % len(paths)]
+                started = time.perf_counter()
+                # The test client skips the request_started/request_finished
+                # connection handling of the real handlers, so do it here.
+                close_old_connections()
+                response = client.get(path, HTTP_HOST=self.host)
+                close_old_connections()
+                timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f'{path} returned {response.status_code}')
+        finally:
+            connection_created.disconnect(count)
+        return created.count(connection.alias), statistics.median(timings)
@@ -0,0 +1,86 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from products.models import Category, Product
+from api.serializers import ProductListSerializer
+from api.values import ProductValuesSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks product list serialization: DRF model serializer vs the '
+        'values() fast path. Test rows are created in a transaction that is '
+        'rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,10000')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument(
+            '--fields',
+            default='',
+            help='Comma separated sparse fieldset to benchmark, e.g. id,name,price,current_price'
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        fields = {name for name in options['fields'].split(',') if name} or None
+        query = f"?fields={options['fields']}" if fields else ''
+        request = Request(APIRequestFactory().get(f'/api/v1/products/{query}'))
+        context = {'request': request}
+
+        self.stdout.write(f"{'rows':>8} {'serializer rows/s':>20} {'values rows/s':>16} {'speedup':>8}")
+        for size in sizes:
+            with transaction.atomic():
+                queryset = self.create_products(size)
+
+                def serializer_path():
+                    products = list(queryset.prefetch_related('categories'))
+                    return ProductListSerializer(products, many=True, context=context).data
+
+                def values_path():
+                    serializer = ProductValuesSerializer(fields=fields, context=context)
+                    return serializer.serialize(serializer.values(queryset))
+
+                slow = self.best_of(serializer_path, options['repeat'])
+                fast = self.best_of(values_path, options['repeat'])
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f'{size:>8} {size / slow:>20,.0f} {size / fast:>16,.0f} {slow / fast:>7.1f}x'
+            )
+
+    def best_of(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def create_products(self, size):
+        category = Category.objects.create(name=f'Benchmark {time.time_ns()}')
+        prefix = f'bench-{time.time_ns()}'
+        Product.objects.bulk_create(
+            Product(
+                name=f'{prefix} product {index}',
+                slug=f'{prefix}-{index}',
+                description='Benchmark product',
+                price=Decimal('100.00') + index % 50,
+                discount_price=Decimal('80.00') if index % 3 == 0 else None,
+                stock=index % 20,
+                brand='Bench',
+            )
+            for index in range(size)
+        )
+        queryset = Product.objects.filter(slug__startswith=prefix)
+        # bulk_create() does not set primary keys on MySQL.
+        Product.categories.through.objects.bulk_create(
+            Product.categories.through(product_id=product_id, category_id=category.pk)
+            for product_id in queryset.values_list('pk', flat=True)
+        )
+        return queryset
@@ -0,0 +1,88 @@
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from api.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the API renderers on synthetic product and order pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        renderers = [('drf json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('fast json', FastJSONRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('orjson is not installed; fast json falls back to stdlib.'))
+        if msgpack is not None:
+            renderers.append(('msgpack', MessagePackRenderer()))
+
+        for label, payload in (('products', self.product_page(rows)), ('orders', self.order_page(rows))):
+            self.stdout.write(f'{label} ({rows} rows)')
+            baseline = None
+            for name, renderer in renderers:
+                elapsed, size = self.best_of(renderer, payload, options['repeat'])
+                baseline = baseline or elapsed
+                self.stdout.write(
+                    f'  {name:<10} {rows / elapsed:>12,.0f} rows/s {size / 1024:>9,.1f} KiB '
+                    f'{baseline / elapsed:>6.1f}x'
+                )
+
+    def best_of(self, renderer, payload, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = renderer.render(payload, renderer.media_type, {})
+            timings.append(time.perf_counter() - started)
+        return min(timings), len(content)
+
+    def product_page(self, rows):
+        return {
+            'count': rows,
+            'results': [
+                {
+                    'id': index,
+                    'name': f'Running shoe {index}',
+                    'slug': f'running-shoe-{index}',
+                    'categories': [1, 3],
+                    'category_names': ['Shoes', 'Running'],
+                    'price': '129.99',
+                    'discount_price': None,
+                    'current_price': Decimal('129.99'),
+                    'stock': index % 40,
+                    'image': f'http://testserver/media/products/{index}.jpg',
+                    'is_featured': index % 9 == 0,
+                }
+                for index in range(rows)
+            ],
+        }
+
+    def order_page(self, rows):
+        # Serializer fields already turn Decimal and datetime model values
+        # into strings; only the nested totals below reach the encoder raw.
+        now = timezone.now()
+        return {
+            'count': rows,
+            'results': [
+                {
+                    'id': index,
+                    'order_number': f'ORD-{index}-A1B2C3',
+                    'status': 'pending',
+                    'status_display': 'Pending',
+                    'total_amount': '249.90',
+                    'final_amount': '249.90',
+                    'created_at': (now - timedelta(minutes=index)).isoformat(),
+                    'is_paid': bool(index % 2),
+                    'totals': {'items': Decimal('249.90'), 'updated_at': now},
+                }
+                for index in range(rows)
+            ],
+        }
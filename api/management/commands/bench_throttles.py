@@ -0,0 +1,52 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from api.throttling import (
+    AnonTokenBucketThrottle,
+    CacheBucketStore,
+    LocalBucketStore,
+    SearchThrottle,
+)
+
+
+class Command(BaseCommand):
+    help = 'Measures token-bucket throttle checks per second for each bucket store.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=100_000)
+        # The default LocMemCache culls past 300 keys, which would reset buckets.
+        parser.add_argument('--clients', type=int, default=100, help='Distinct client IPs.')
+
+    def handle(self, *args, **options):
+        checks = options['checks']
+        factory = APIRequestFactory()
+        requests = []
+        for index in range(options['clients']):
+            request = Request(factory.get(
+                '/api/v1/products/',
+                {'search': 'shoe'},
+                REMOTE_ADDR=f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}',
+            ))
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        for name, store in (('local', LocalBucketStore()), ('cache', CacheBucketStore())):
+            throttles = [throttle_class() for throttle_class in (AnonTokenBucketThrottle, SearchThrottle)]
+            for throttle in throttles:
+                throttle.store = store
+
+            allowed = 0
+            started = time.perf_counter()
+            for index in range(checks):
+                request = requests[index % len(requests)]
+                allowed += all(throttle.allow_request(request, None) for throttle in throttles)
+            elapsed = time.perf_counter() - started
+            store.clear()
+
+            self.stdout.write(
+                f'{name:<6} {checks / elapsed:>12,.0f} checks/s  '
+                f'{elapsed / checks * 1e6:>6.1f} us/check  allowed {allowed}/{checks}'
+            )
@@ -0,0 +1,145 @@
+import re
+from collections import OrderedDict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from products.models import Category, Product
+from sport_shop_project.db_routers import use_primary
+
+DUMMY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+# Literals are masked so one query shape is explained once.
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class Command(BaseCommand):
+    help = (
+        'Replays catalog, review and order pages with caching off, runs EXPLAIN '
+        'on every distinct SELECT and reports full table scans and filesorts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths', help='Extra path to replay.')
+        parser.add_argument('--user', help='Username to replay the logged-in pages as.')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--all', action='store_true', help='List queries without findings too.')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor not in ('mysql', 'sqlite', 'postgresql'):
+            raise CommandError(f'EXPLAIN parsing is not implemented for {connection.vendor}.')
+
+        client = Client(HTTP_HOST=options['host'])
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user {options['user']!r}.")
+
+        shapes = OrderedDict()
+        # Product pages count views, score trending and write the session, so
+        # the replay runs in a transaction that is rolled back. Cached sessions
+        # would lose the login without a real cache, and trending points are
+        # flushed on every view to land inside that transaction.
+        replay_settings = override_settings(
+            CACHES=DUMMY_CACHES,
+            SESSION_ENGINE='django.contrib.sessions.backends.db',
+            TRENDING_FLUSH_SECONDS=0,
+        )
+        with use_primary(), replay_settings, transaction.atomic(using=connection.alias):
+            if user is not None:
+                client.force_login(user)
+            for path in self.get_paths(user) + (options['paths'] or []):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(path)
+                if response.status_code != 200:
+                    self.stderr.write(f'{path} returned {response.status_code}, skipped')
+                    continue
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    shape = LITERAL_RE.sub('?', sql)
+                    entry = shapes.setdefault(shape, {'sql': sql, 'paths': set(), 'count': 0})
+                    entry['paths'].add(path)
+                    entry['count'] += 1
+            transaction.set_rollback(True, using=connection.alias)
+
+        flagged = 0
+        for entry in shapes.values():
+            findings = self.explain(connection, entry['sql'])
+            if not findings and not options['all']:
+                continue
+            flagged += bool(findings)
+            style = self.style.WARNING if findings else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{entry['count']}x on {', '.join(sorted(entry['paths']))}: "
+                f"{'; '.join(findings) or 'ok'}"
+            ))
+            self.stdout.write(f"    {entry['sql'][:300]}")
+        self.stdout.write(f'{len(shapes)} distinct queries, {flagged} with full scans or filesorts.')
+
+    def get_paths(self, user):
+        paths = ['/', reverse('products:product_list')]
+        paths += [f"{reverse('products:product_list')}?sort={sort}" for sort in ('price', '-price', '-views_count', 'trending')]
+        paths += ['/api/v1/products/', '/api/v1/products/?ordering=price', '/api/v1/reviews/']
+        category = Category.objects.filter(is_active=True).first()
+        if category is not None:
+            paths.append(reverse('products:category', args=[category.slug]))
+        product = Product.objects.filter(is_active=True).first()
+        if product is not None:
+            paths.append(reverse('products:product_detail', args=[product.slug]))
+            paths.append(f'/api/v1/reviews/?product={product.pk}')
+        if user is not None:
+            paths += [reverse('orders:order_list'), reverse('orders:cart'), '/api/v1/orders/']
+        return paths
+
+    def explain(self, connection, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                return self.sqlite_findings([row[-1] for row in cursor.fetchall()])
+            cursor.execute(f'EXPLAIN {sql}')
+            if connection.vendor == 'postgresql':
+                return self.postgresql_findings([row[0] for row in cursor.fetchall()])
+            columns = [column[0].lower() for column in cursor.description]
+            return self.mysql_findings([dict(zip(columns, row)) for row in cursor.fetchall()])
+
+    def mysql_findings(self, rows):
+        findings = []
+        for row in rows:
+            table = row.get('table')
+            if row.get('type') == 'ALL':
+                findings.append(f'full scan of {table} (~{row.get("rows")} rows)')
+            elif row.get('type') == 'index':
+                findings.append(f'full index scan of {table}')
+            extra = row.get('extra') or ''
+            if 'Using filesort' in extra:
+                findings.append(f'filesort on {table}')
+            if 'Using temporary' in extra:
+                findings.append(f'temporary table for {table}')
+        return findings
+
+    def sqlite_findings(self, details):
+        findings = []
+        for detail in details:
+            if detail.startswith('SCAN ') and ' INDEX ' not in detail:
+                findings.append(f'full scan: {detail[5:]}')
+            elif detail.startswith('USE TEMP B-TREE'):
+                findings.append(detail.lower().replace('use temp b-tree', 'filesort'))
+        return findings
+
+    def postgresql_findings(self, lines):
+        findings = []
+        for line in lines:
+            line = line.strip().lstrip('-> ')
+            if line.startswith(('Seq Scan', 'Parallel Seq Scan')):
+                findings.append(line.split('  ')[0].lower())
+            elif line.startswith('Sort '):
+                findings.append('sort')
+        return findings
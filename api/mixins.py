@@ -0,0 +1,177 @@
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from products.cache import aget_catalog_version, catalog_last_modified, get_catalog_version
+from .serializers import get_requested_fields
+
+
+def make_validators(request, last_modified, state):
+    """Returns an (ETag, Last-Modified timestamp) pair for a response state."""
+    fingerprint = repr((
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+        state,
+    ))
+    etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+    if last_modified is not None:
+        last_modified = timegm(last_modified.utctimetuple())
+    return etag, last_modified
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag / Last-Modified validators to ``list`` and ``retrieve``.
+
+    Validators come from a single aggregate query (max timestamp and row
+    count) over the filtered queryset, so a matching ``If-None-Match`` is
+    answered with 304 before anything is serialized. Such responses carry no
+    Last-Modified: deleting or deactivating a row does not move the max
+    timestamp, so ``If-Modified-Since`` would keep matching. Views whose
+    state is the catalog version (:class:`CatalogVersionStateMixin`) send it.
+    """
+    list_state_fields = ('updated_at',)
+    detail_state_fields = None
+
+    def get_list_state_fields(self):
+        return self.list_state_fields
+
+    def get_detail_state_fields(self):
+        return self.detail_state_fields or self.list_state_fields
+
+    def get_state_aggregates(self, fields):
+        aggregates = {'count': Count('pk', distinct=True)}
+        for index, field in enumerate(fields):
+            aggregates[f'max_{index}'] = Max(field)
+            relation = field.rpartition('__')[0]
+            if relation:
+                aggregates[f'count_{index}'] = Count(f'{relation}__pk', distinct=True)
+        return aggregates
+
+    def resolve_state(self, state, fields):
+        return None, sorted(state.items())
+
+    def get_queryset_state(self, queryset, fields):
+        state = queryset.order_by().aggregate(**self.get_state_aggregates(fields))
+        return self.resolve_state(state, fields)
+
+    async def aget_queryset_state(self, queryset, fields):
+        state = await queryset.order_by().aaggregate(**self.get_state_aggregates(fields))
+        return self.resolve_state(state, fields)
+
+    def get_validators(self, request, last_modified, state):
+        return make_validators(request, last_modified, state)
+
+    def get_list_state(self, queryset):
+        return self.get_queryset_state(queryset, self.get_list_state_fields())
+
+    def is_list_conditional(self, request):
+        """False for lists whose state does not capture what they show."""
+        return True
+
+    def get_detail_state(self, queryset):
+        return self.get_queryset_state(queryset, self.get_detail_state_fields())
+
+    async def aget_detail_state(self, queryset):
+        return await self.aget_queryset_state(queryset, self.get_detail_state_fields())
+
+    def conditional_response(self, request, last_modified, state, handler, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, last_modified, state)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_list_conditional(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        last_modified, state = self.get_list_state(queryset)
+        return self.conditional_response(
+            request, last_modified, state, super().list, *args, **kwargs
+        )
+
+    def get_state_queryset(self):
+        return self.get_queryset()
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_state_queryset()).filter(
+            **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        last_modified, state = self.get_detail_state(queryset)
+        return self.conditional_response(
+            request, last_modified, state, super().retrieve, *args, **kwargs
+        )
+
+
+class CatalogVersionStateMixin:
+    """
+    Validators from the catalog version. Every catalog write bumps it,
+    deletes and deactivations included, so lists need no query here and
+    Last-Modified is the time of the last bump.
+
+    A detail state adds the object's ``detail_volatile_fields``, which
+    queryset updates change without a bump, and one subquery per relation in
+    ``detail_related_states`` for related rows outside the catalog. It is
+    read in a single query without joins; details send only the ETag.
+    """
+    # Columns queryset updates may change without a catalog version bump.
+    detail_volatile_fields = ()
+    # (reverse relation, timestamp field) pairs summarised by max and count.
+    detail_related_states = ()
+
+    def get_list_state(self, queryset):
+        version = get_catalog_version()
+        return catalog_last_modified(version), version
+
+    def get_detail_state_values(self, queryset):
+        annotations = {}
+        for relation, field in self.detail_related_states:
+            remote = queryset.model._meta.get_field(relation)
+            related = remote.related_model._default_manager.filter(
+                **{remote.field.name: OuterRef('pk')}
+            ).order_by().values(remote.field.name)
+            annotations[f'{relation}_max'] = Subquery(related.annotate(value=Max(field)).values('value'))
+            annotations[f'{relation}_count'] = Subquery(related.annotate(value=Count('pk')).values('value'))
+        return queryset.order_by().values(*self.detail_volatile_fields, **annotations)
+
+    def get_detail_state(self, queryset):
+        row = self.get_detail_state_values(queryset).first()
+        return None, (get_catalog_version(), row and sorted(row.items()))
+
+    async def aget_detail_state(self, queryset):
+        row = await self.get_detail_state_values(queryset).afirst()
+        return None, (await aget_catalog_version(), row and sorted(row.items()))
+
+
+class ValuesListMixin:
+    """
+    Serves ``list`` from ``values_list()`` rows through
+    ``values_serializer_class`` instead of instantiating model objects.
+    """
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        return self.values_serializer_class(
+            fields=get_requested_fields(self.request),
+            context=self.get_serializer_context(),
+        )
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
@@ -6,6 +6,28 @@ from django.contrib.auth.models import User
 from users.models import UserProfile
 
 
+def get_requested_fields(request):
+    """Returns the set of names passed in ``?fields=``, or None if absent."""
+    if request is None:
+        return None
+    params = getattr(request, 'query_params', None)
+    raw = (request.GET if params is None else params).get('fields')
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """Drops every field not listed in the request's ``?fields=`` parameter."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -18,8 +40,14 @@ class ProductImageSerializer(serializers.ModelSerializer):
         fields = ('id', 'image', 'alt_text', 'is_primary')
 
 
-class ProductListSerializer(serializers.ModelSerializer):
-    category_name = serializers.CharField(source='category.name', read_only=True)
+class ProductListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    categories = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    category_names = serializers.SlugRelatedField(
+        source='categories',
+        slug_field='name',
+        many=True,
+        read_only=True
+    )
 
     class Meta:
         model = Product
@@ -27,8 +55,8 @@ class ProductListSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'slug',
-            'category',
-            'category_name',
+            'categories',
+            'category_names',
             'price',
             'discount_price',
             'current_price',
@@ -38,8 +66,14 @@ class ProductListSerializer(serializers.ModelSerializer):
         )
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
-    category_name = serializers.CharField(source='category.name', read_only=True)
+class ProductDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    categories = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    category_names = serializers.SlugRelatedField(
+        source='categories',
+        slug_field='name',
+        many=True,
+        read_only=True
+    )
     images = ProductImageSerializer(many=True, read_only=True)
     avg_rating = serializers.SerializerMethodField()
 
@@ -49,9 +83,10 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'slug',
+            'family',
             'description',
-            'category',
-            'category_name',
+            'categories',
+            'category_names',
             'price',
             'discount_price',
             'current_price',
@@ -70,6 +105,8 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         )
 
     def get_avg_rating(self, obj):
+        if hasattr(obj, 'approved_avg_rating'):
+            return obj.approved_avg_rating or 0
         reviews = Review.objects.filter(product=obj, is_approved=True)
         if reviews.exists():
             from django.db.models import Avg
@@ -0,0 +1,18 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import UserProfile
+from .authentication import principal_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_user_principal(sender, instance, **kwargs):
+    # Other processes keep their copy until API_TOKEN_USER_CACHE_TTL is up.
+    principal_cache.discard(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def evict_profile_principal(sender, instance, **kwargs):
+    principal_cache.discard(instance.user_id)
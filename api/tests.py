@@ -1,3 +1,650 @@
-from django.test import TestCase
+import csv
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from products.cache import CATALOG_VERSION_KEY
+from products.models import Category, Product
+from products.trending import add_points
+from users.models import UserProfile
+from . import async_views, exports, renderers
+from .authentication import get_token_user, make_token, principal_cache
+from .exports import iter_chunks
+from .renderers import FastJSONRenderer, MessagePackRenderer
+from .serializers import ProductDetailSerializer, ProductListSerializer, get_requested_fields
+from .throttling import AnonTokenBucketThrottle, CacheBucketStore, LocalBucketStore, get_bucket_store
+from .values import ProductValuesSerializer
+
+
+def make_product(name, **fields):
+    fields.setdefault('price', 10)
+    fields.setdefault('stock', 5)
+    return Product.objects.create(name=name, slug=fields.pop('slug', name.lower().replace(' ', '-')), **fields)
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_bucket_store().clear()
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Shoes', slug='shoes')
+        self.first = make_product('Trail Shoe')
+        self.second = make_product('Road Shoe')
+
+    def test_list_last_modified_follows_deactivation(self):
+        old_version = int(datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+        cache.set(CATALOG_VERSION_KEY, old_version, None)
+        response = self.client.get('/api/v1/products/')
+        self.assertEqual(response['Last-Modified'], http_date(old_version / 1000))
+
+        self.second.is_active = False
+        self.second.save()
+
+        response = self.client.get('/api/v1/products/', HTTP_IF_MODIFIED_SINCE=http_date(old_version / 1000))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()['results']], [self.first.pk])
+
+    def test_detail_sends_only_etag(self):
+        response = self.client.get(f'/api/v1/products/{self.first.slug}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+
+        response = self.client.get(f'/api/v1/products/{self.first.slug}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def assert_detail_etag_changes(self, change):
+        url = f'/api/v1/products/{self.first.slug}/'
+        etag = self.client.get(url)['ETag']
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response
+
+    def test_detail_etag_follows_views_count(self):
+        response = self.assert_detail_etag_changes(self.first.increment_views)
+        self.assertEqual(response.json()['views_count'], 1)
+
+    def test_detail_etag_follows_queryset_stock_update(self):
+        def sell():
+            Product.objects.filter(pk=self.first.pk).update(stock=3)
+
+        response = self.assert_detail_etag_changes(sell)
+        self.assertEqual(response.json()['stock'], 3)
+
+    def test_detail_etag_follows_reviews(self):
+        user = User.objects.create_user('reviewer')
+        review = self.first.reviews.create(user=user, rating=4, title='Good', content='Fits well.')
+        self.assert_detail_etag_changes(review.delete)
+
+    def test_detail_not_modified_costs_one_query(self):
+        url = f'/api/v1/products/{self.first.slug}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_detail_etag_async(self):
+        factory = AsyncRequestFactory()
+        response = await async_views.product_detail(factory.get('/'), slug=self.first.slug)
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        response = await async_views.product_detail(factory.get('/', headers={'If-None-Match': etag}), slug=self.first.slug)
+        self.assertEqual(response.status_code, 304)
+
+        await sync_to_async(self.first.increment_views)()
+        response = await async_views.product_detail(factory.get('/', headers={'If-None-Match': etag}), slug=self.first.slug)
+        self.assertEqual(response.status_code, 200)
+
+    def test_review_list_sends_only_etag(self):
+        response = self.client.get('/api/v1/reviews/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+
+class VolatileOrderingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.products = [make_product(f'Shoe {index}', views_count=10 - index) for index in range(3)]
+
+    def ids(self, response):
+        return [item['id'] for item in response.json()['results']]
+
+    def test_views_count_ordering_is_not_cached(self):
+        response = self.client.get('/api/v1/products/?ordering=-views_count')
+        self.assertEqual(self.ids(response), [product.pk for product in self.products])
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('X-Cache', response)
+
+        for _ in range(5):
+            self.products[2].increment_views()
+
+        response = self.client.get('/api/v1/products/?ordering=-views_count')
+        self.assertEqual(self.ids(response)[0], self.products[2].pk)
+
+    async def test_views_count_ordering_is_not_cached_async(self):
+        request = AsyncRequestFactory().get('/api/v1/products/?ordering=-views_count')
+        response = await async_views.product_list(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('X-Cache', response)
+
+    def test_trending_ordering_is_not_cached(self):
+        response = self.client.get('/api/v1/products/?ordering=-trending_score')
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('X-Cache', response)
+
+        add_points({self.products[2].pk: 100.0})
+        response = self.client.get('/api/v1/products/?ordering=-trending_score')
+        self.assertEqual(self.ids(response)[0], self.products[2].pk)
+
+    def test_other_orderings_stay_cached(self):
+        self.client.get('/api/v1/products/?ordering=name')
+        response = self.client.get('/api/v1/products/?ordering=name')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertIn('ETag', response)
+
+
+class FuzzySearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.samba = make_product('Samba', brand='Adidas')
+        self.gazelle = make_product('Gazelle', brand='Adidas')
+        self.weak = make_product('Adida Shoe')
+        make_product('Air Max', brand='Nike')
+
+    def names(self, data):
+        return [item['name'] for item in data['results']]
+
+    def test_typo_finds_products_ranked_by_similarity(self):
+        response = self.client.get('/api/v1/products/?search=adiddas')
+        self.assertEqual(response.status_code, 200)
+        # Created last, so the default -created_at ordering would put it first.
+        self.assertEqual(self.names(response.json()), ['Samba', 'Gazelle', 'Adida Shoe'])
+
+    def test_explicit_ordering_replaces_rank(self):
+        response = self.client.get('/api/v1/products/?search=adiddas&ordering=name')
+        self.assertEqual(self.names(response.json()), ['Adida Shoe', 'Gazelle', 'Samba'])
+
+    async def test_typo_search_async(self):
+        request = AsyncRequestFactory().get('/api/v1/products/?search=adiddas')
+        response = await async_views.product_list(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(json.loads(response.content)), ['Samba', 'Gazelle', 'Adida Shoe'])
+
+
+class ValuesSerializerParityTests(APITestCase):
+    field_selections = [
+        None,
+        'id,name,current_price',
+        'categories,category_names,image,stock',
+        'name,bogus',
+        'bogus',
+    ]
+
+    def setUp(self):
+        super().setUp()
+        shoes = Category.objects.create(name='Shoes', slug='shoes')
+        running = Category.objects.create(name='Running', slug='running')
+        self.products = [
+            make_product('Trail Shoe', discount_price='7.50', image='products/trail.jpg', is_featured=True),
+            make_product('Road Shoe', price='99.99'),
+            make_product('Sock', price=5),
+        ]
+        self.products[0].categories.set([shoes, running])
+        self.products[1].categories.set([shoes])
+
+    def render(self, data):
+        return json.loads(JSONRenderer().render(data))
+
+    def make_request(self, fields):
+        return Request(APIRequestFactory().get('/api/v1/products/', {'fields': fields} if fields else {}))
+
+    def serializer_data(self, serializer_class, instances, fields):
+        request = self.make_request(fields)
+        return self.render(serializer_class(instances, many=True, context={'request': request}).data)
+
+    def get(self, path, fields):
+        params = {'fields': fields} if fields else {}
+        return self.client.get(path, {**params, 'ordering': 'price'}).json()
+
+    def test_list_matches_the_serializer(self):
+        instances = Product.objects.order_by('price')
+        for fields in self.field_selections:
+            with self.subTest(fields=fields):
+                results = self.get('/api/v1/products/', fields)['results']
+                self.assertEqual(results, self.serializer_data(ProductListSerializer, instances, fields))
+
+    def test_values_serializer_matches_the_serializer(self):
+        instances = Product.objects.order_by('price')
+        for fields in self.field_selections:
+            with self.subTest(fields=fields):
+                request = self.make_request(fields)
+                serializer = ProductValuesSerializer(
+                    fields=get_requested_fields(request), context={'request': request}
+                )
+                data = self.render(serializer.serialize(serializer.values(instances)))
+                self.assertEqual(data, self.serializer_data(ProductListSerializer, instances, fields))
+
+    def test_detail_agrees_with_the_list(self):
+        instances = Product.objects.order_by('price')
+        for fields in self.field_selections:
+            results = self.get('/api/v1/products/', fields)['results']
+            for product, item in zip(instances, results, strict=True):
+                with self.subTest(fields=fields, slug=product.slug):
+                    detail = self.get(f'/api/v1/products/{product.slug}/', fields)
+                    self.assertEqual(detail, self.serializer_data(ProductDetailSerializer, [product], fields)[0])
+                    self.assertEqual({name: detail[name] for name in item}, item)
+
+
+class BulkLookupTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.trail = make_product('Trail Shoe', discount_price='7.50', image='products/trail.jpg')
+        self.road = make_product('Road Shoe', stock=0)
+        self.hidden = make_product('Old Shoe', is_active=False)
+
+    def get(self, name, ids, **extra):
+        return self.client.get(f'/api/v1/products/{name}/', {'ids': ids}, **extra)
+
+    def test_bulk_returns_active_products_in_id_order(self):
+        ids = f'{self.road.pk},{self.hidden.pk},999999,{self.trail.pk},{self.road.pk}'
+        data = self.get('bulk', ids).json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([item['id'] for item in data['results']], [self.trail.pk, self.road.pk])
+        self.assertEqual(data['results'][0], {
+            'id': self.trail.pk,
+            'slug': 'trail-shoe',
+            'name': 'Trail Shoe',
+            'price': '10.00',
+            'discount_price': '7.50',
+            'current_price': 7.5,
+            'stock': 5,
+            'image': 'http://testserver/media/products/trail.jpg',
+        })
+
+    def test_availability(self):
+        data = self.get('availability', f'{self.trail.pk},{self.road.pk},{self.hidden.pk}').json()
+        self.assertEqual(data['results'], [
+            {'id': self.trail.pk, 'price': '10.00', 'current_price': 7.5, 'stock': 5, 'is_in_stock': True},
+            {'id': self.road.pk, 'price': '10.00', 'current_price': 10.0, 'stock': 0, 'is_in_stock': False},
+        ])
+
+    def test_id_cap(self):
+        for name in ['bulk', 'availability']:
+            with self.subTest(name=name):
+                response = self.get(name, ','.join(str(pk) for pk in range(1, 201)))
+                self.assertEqual(response.status_code, 200)
+                response = self.get(name, ','.join(str(pk) for pk in range(1, 202)))
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'ids': 'At most 200 ids are allowed per request.'})
+
+    def test_malformed_ids(self):
+        for ids in ['1,two', '1.5', 'null']:
+            with self.subTest(ids=ids):
+                response = self.get('bulk', ids)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'ids': 'Expected a comma separated list of product ids.'})
+        for ids in ['', ' , ']:
+            with self.subTest(ids=ids):
+                response = self.get('availability', ids)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'ids': 'This parameter is required.'})
+
+    def test_cache_is_keyed_by_catalog_version(self):
+        ids = f'{self.trail.pk},{self.road.pk}'
+        self.get('availability', ids)
+        with self.assertNumQueries(0):
+            self.get('availability', ids)
+
+        # Same ids in another order and with duplicates share the entry.
+        with self.assertNumQueries(0):
+            self.get('availability', f'{self.road.pk},{self.trail.pk},{self.road.pk}')
+
+        self.road.stock = 3
+        self.road.save()
+        data = self.get('availability', ids).json()
+        self.assertEqual(data['results'][1]['stock'], 3)
+        self.assertTrue(data['results'][1]['is_in_stock'])
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'shop.example.com'])
+    def test_cache_is_keyed_by_host(self):
+        ids = str(self.trail.pk)
+        data = self.get('bulk', ids).json()
+        self.assertEqual(data['results'][0]['image'], 'http://testserver/media/products/trail.jpg')
+        data = self.get('bulk', ids, HTTP_HOST='shop.example.com').json()
+        self.assertEqual(data['results'][0]['image'], 'http://shop.example.com/media/products/trail.jpg')
+
+
+class ProductExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        shoes = Category.objects.create(name='Shoes', slug='shoes')
+        trail = Category.objects.create(name='Trail', slug='trail')
+        self.products = [make_product(f'Shoe {index}', brand='Acme') for index in range(5)]
+        self.products[0].categories.set([trail, shoes])
+        Product.objects.filter(pk=self.products[1].pk).update(discount_price='7.50')
+        make_product('Hidden Shoe', is_active=False)
+
+    def export(self, **params):
+        response = self.client.get('/api/v1/products/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def small_chunks(self, chunk_size=2):
+        return mock.patch.object(
+            exports, 'iter_chunks', lambda queryset, after: iter_chunks(queryset, after, chunk_size)
+        )
+
+    def test_ndjson(self):
+        response = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="products.ndjson"')
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([record['id'] for record in records], [product.pk for product in self.products])
+        first, second = records[:2]
+        self.assertEqual(first['categories'], ['Shoes', 'Trail'])
+        self.assertEqual((first['price'], first['current_price']), ('10.00', '10.00'))
+        self.assertEqual((second['discount_price'], second['current_price']), ('7.50', '7.50'))
+        self.assertEqual(second['categories'], [])
+
+    def test_csv(self):
+        response = self.export(output='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], list(exports.PRODUCT_EXPORT_COLUMNS) + ['current_price', 'categories'])
+        self.assertEqual(len(rows), 6)
+        first = dict(zip(rows[0], rows[1]))
+        self.assertEqual(first['id'], str(self.products[0].pk))
+        self.assertEqual(first['categories'], 'Shoes|Trail')
+        self.assertEqual((first['brand'], first['discount_price'], first['is_featured']), ('Acme', '', 'False'))
+        self.assertEqual(dict(zip(rows[0], rows[2]))['current_price'], '7.50')
+
+    def test_invalid_options(self):
+        response = self.client.get('/api/v1/products/export/', {'output': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/products/export/', {'after': 'last'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_resume_after_an_interrupted_export(self):
+        ids = [product.pk for product in self.products]
+        with self.small_chunks():
+            response = self.export()
+            lines = iter(response.streaming_content)
+            received = [json.loads(next(lines))['id'] for _ in range(2)]
+            # The client drops the connection after the first chunk.
+            response.close()
+
+            # Rows change while the client is away.
+            self.products[0].delete()
+            added = make_product('New Shoe')
+
+            response = self.export(after=received[-1])
+            received += [json.loads(line)['id'] for line in response.streaming_content]
+
+        self.assertEqual(received, ids + [added.pk])
+
+    def test_iter_chunks(self):
+        queryset = Product.objects.filter(is_active=True).values('id')
+        ids = [product.pk for product in self.products]
+        with self.assertNumQueries(3):
+            chunks = [[row['id'] for row in chunk] for chunk in iter_chunks(queryset, 0, 2)]
+        self.assertEqual(chunks, [ids[:2], ids[2:4], ids[4:]])
+        self.assertEqual([len(chunk) for chunk in iter_chunks(queryset, ids[0], 2)], [2, 2])
+        self.assertEqual(list(iter_chunks(queryset, ids[-1], 2)), [])
+
+
+class ProductVariantsTests(APITestCase):
+    def test_variants(self):
+        medium = make_product('Samba', slug='samba-m', size='M', discount_price='7.50')
+        large = make_product('Samba', slug='samba-l', size='L', stock=0)
+        make_product('Samba', slug='samba-s', size='S', is_active=False)
+
+        response = self.client.get('/api/v1/products/samba-m/variants/')
+        self.assertEqual(response.json(), {'count': 2, 'results': [
+            {'id': large.pk, 'slug': 'samba-l', 'size': 'L', 'color': None, 'current_price': 10.0,
+             'stock': 0, 'is_in_stock': False},
+            {'id': medium.pk, 'slug': 'samba-m', 'size': 'M', 'color': None, 'current_price': 7.5,
+             'stock': 5, 'is_in_stock': True},
+        ]})
+        self.assertEqual(self.client.get('/api/v1/products/missing/variants/').status_code, 404)
+
+
+class FastRendererTests(SimpleTestCase):
+    def payload(self):
+        return {
+            'price': Decimal('12.50'),
+            'created_at': datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=timezone.utc),
+            'naive': datetime(2026, 3, 1, 9, 30),
+            'day': date(2026, 3, 1),
+            'duration': timedelta(minutes=90),
+            'label': gettext_lazy('Product'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'text': 'Кросівки\u2028',
+            'ids': (1, 2),
+            'nested': [{'rating': 4.5, 'none': None, 'yes': True}],
+        }
+
+    def test_matches_json_renderer(self):
+        if renderers.orjson is None:
+            self.skipTest('orjson is not installed')
+        self.assertEqual(FastJSONRenderer().render(self.payload()), JSONRenderer().render(self.payload()))
+
+    def test_fallback_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(self.payload()), JSONRenderer().render(self.payload()))
+
+    def test_indented_output_uses_json_renderer(self):
+        expected = JSONRenderer().render(self.payload(), 'application/json; indent=2')
+        self.assertEqual(FastJSONRenderer().render(self.payload(), 'application/json; indent=2'), expected)
+
+    def test_msgpack_matches_json(self):
+        if renderers.msgpack is None:
+            self.skipTest('msgpack is not installed')
+        data = renderers.msgpack.unpackb(MessagePackRenderer().render(self.payload()))
+        self.assertEqual(data, json.loads(JSONRenderer().render(self.payload())))
+
+
+class AsyncAuthenticationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('buyer')
+        make_product('Trail Shoe')
+
+    async def get(self, path, token):
+        request = AsyncRequestFactory().get(path, headers={'Authorization': f'Bearer {token}'})
+        if path == '/api/v1/products/':
+            return await async_views.product_list(request)
+        return await async_views.product_detail(request, slug='trail-shoe')
+
+    async def test_valid_token_uses_the_user_bucket(self):
+        token = await sync_to_async(make_token)(self.user)
+        throttle_rates = {**AnonTokenBucketThrottle.THROTTLE_RATES, 'anon': '1/min'}
+        with mock.patch.object(AnonTokenBucketThrottle, 'THROTTLE_RATES', throttle_rates):
+            for path in ['/api/v1/products/', '/api/v1/products/', '/api/v1/products/trail-shoe/']:
+                response = await self.get(path, token)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('X-Cache', response)
+
+    async def test_invalid_token_is_rejected(self):
+        token = await sync_to_async(make_token)(self.user)
+        for path in ['/api/v1/products/', '/api/v1/products/trail-shoe/']:
+            with self.subTest(path=path):
+                response = await self.get(path, token[:-2] + 'xx')
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+                self.assertEqual(json.loads(response.content), {'detail': 'Invalid token.'})
+
+
+class TokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        principal_cache.entries.clear()
+        self.user = User.objects.create_user('buyer', 'buyer@example.com', 'secret')
+        response = self.client.post('/api/v1/auth/token/', {'username': 'buyer', 'password': 'secret'})
+        self.token = response.json()['token']
+
+    def me(self, token=None):
+        return self.client.get('/api/v1/users/me/', HTTP_AUTHORIZATION=f'Bearer {token or self.token}')
+
+    def assert_rejected(self, response, detail):
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer')
+        self.assertEqual(response.json(), {'detail': detail})
+
+    def test_valid_token(self):
+        response = self.me()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'buyer')
+
+    def test_bad_signature(self):
+        self.assert_rejected(self.me(self.token[:-2] + 'xx'), 'Invalid token.')
+        self.assert_rejected(self.me('not-a-token'), 'Invalid token.')
+
+    def test_expired_token(self):
+        with override_settings(API_TOKEN_MAX_AGE=-1):
+            self.assert_rejected(self.me(), 'Token has expired.')
+
+    def test_revocation_applies_to_the_next_request(self):
+        self.assertEqual(self.me().status_code, 200)
+        response = self.client.post('/api/v1/auth/token/revoke/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 204)
+        self.assert_rejected(self.me(), 'Token has been revoked.')
+
+        response = self.client.post('/api/v1/auth/token/', {'username': 'buyer', 'password': 'secret'})
+        self.assertEqual(self.me(response.json()['token']).status_code, 200)
+
+    def test_inactive_user_is_rejected(self):
+        self.assertEqual(self.me().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assert_rejected(self.me(), 'User inactive or deleted.')
+
+    def test_cache_hit_costs_no_queries(self):
+        self.me()
+        with self.assertNumQueries(0):
+            response = self.me()
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_hits_are_copies(self):
+        get_token_user(self.user.pk)
+        first, second = get_token_user(self.user.pk), get_token_user(self.user.pk)
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.profile, second.profile)
+        first.profile.city = 'Lviv'
+        first.request_state = 'first'
+        self.assertIsNone(second.profile.city)
+        self.assertFalse(hasattr(second, 'request_state'))
+
+    def test_profile_save_evicts_the_cached_user(self):
+        self.me()
+        profile = UserProfile.objects.get(user=self.user)
+        profile.city = 'Lviv'
+        profile.save(update_fields=['city', 'updated_at'])
+        self.assertEqual(self.me().json()['profile']['city'], 'Lviv')
+
+
+class FrozenClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketStoreTests(TestCase):
+    """Two requests per second with a burst of four, on both stores."""
+    rate = 2
+    capacity = 4
+
+    def setUp(self):
+        cache.clear()
+        self.clock = FrozenClock()
+        for name in ('monotonic', 'time'):
+            patcher = mock.patch(f'api.throttling.time.{name}', self.clock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def stores(self):
+        return [LocalBucketStore(), CacheBucketStore()]
+
+    def consume(self, store, times=1):
+        return [store.consume('client', self.rate, self.capacity) for _ in range(times)]
+
+    def test_burst_up_to_capacity(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                results = self.consume(store, self.capacity)
+                self.assertEqual(results, [(True, 0)] * self.capacity)
+
+    def test_exhaustion_reports_wait(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                self.consume(store, self.capacity)
+                allowed, wait = store.consume('client', self.rate, self.capacity)
+                self.assertFalse(allowed)
+                self.assertAlmostEqual(wait, 1 / self.rate)
+                self.assertEqual(store.consume('other', self.rate, self.capacity), (True, 0))
+            cache.clear()
+
+    def test_refill(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                self.consume(store, self.capacity)
+                self.clock.advance(0.4)
+                self.assertFalse(store.consume('client', self.rate, self.capacity)[0])
+                self.clock.advance(0.1)
+                self.assertTrue(store.consume('client', self.rate, self.capacity)[0])
+                self.assertFalse(store.consume('client', self.rate, self.capacity)[0])
+            cache.clear()
+
+    def test_refill_is_capped_at_capacity(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                self.consume(store, self.capacity)
+                self.clock.advance(3600)
+                results = self.consume(store, self.capacity + 1)
+                self.assertEqual([allowed for allowed, wait in results], [True] * self.capacity + [False])
+            cache.clear()
+
+
+class TokenBucketThrottleTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.clock = FrozenClock()
+        patcher = mock.patch('api.throttling.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        make_product('Trail Shoe')
+
+    def test_anonymous_burst_then_429_then_refill(self):
+        throttle_rates = {**AnonTokenBucketThrottle.THROTTLE_RATES, 'anon': '3/min'}
+        with mock.patch.object(AnonTokenBucketThrottle, 'THROTTLE_RATES', throttle_rates):
+            statuses = [self.client.get('/api/v1/categories/').status_code for _ in range(4)]
+            self.assertEqual(statuses, [200, 200, 200, 429])
+
+            response = self.client.get('/api/v1/categories/')
+            self.assertEqual(response['Retry-After'], '20')
+
+            self.clock.advance(20)
+            self.assertEqual(self.client.get('/api/v1/categories/').status_code, 200)
+            self.assertEqual(self.client.get('/api/v1/categories/').status_code, 429)
@@ -0,0 +1,164 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LocalBucketStore:
+    """
+    Keeps buckets in process memory. Suitable for a single node; with several
+    workers each one enforces the rate on its own share of the traffic.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, rate, capacity):
+        now = time.monotonic()
+        with self.lock:
+            tokens, stamp = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Keeps buckets in a Django cache shared by all nodes.
+
+    The read-modify-write is not atomic, so under concurrent requests for the
+    same key a few extra requests may slip through; that is acceptable for
+    rate limiting and avoids a lock round trip per check. The cache must be
+    able to hold a key per active client; evicted buckets start full.
+    """
+    key_prefix = 'throttle'
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def consume(self, key, rate, capacity):
+        now = time.time()
+        key = f'{self.key_prefix}:{key}'
+        tokens, stamp = self.cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(0, now - stamp) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Expire once the bucket would be full again; a missing key means full.
+        self.cache.set(key, (tokens, now), math.ceil((capacity - tokens) / rate) + 1)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+    def clear(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.API_THROTTLE_STORE)()
+    return _store
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket on top of DRF's rate settings: ``'60/min'`` allows a burst of
+    60 requests and refills one token per second.
+    """
+    store = None
+
+    def get_store(self):
+        return self.store or get_bucket_store()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        capacity = self.num_requests
+        allowed, self._wait = self.get_store().consume(self.key, capacity / self.duration, capacity)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+    def get_requester_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return f'{self.scope}:{self.get_ident(request)}'
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return f'{self.scope}:{request.user.pk}'
+
+
+class SearchThrottle(TokenBucketThrottle):
+    """Limits requests that use the ``search`` filter, which can't use an index."""
+    scope = 'search'
+
+    def get_cache_key(self, request, view):
+        if not request.query_params.get('search', '').strip():
+            return None
+        return f'{self.scope}:{self.get_requester_ident(request)}'
+
+
+class WriteTokenBucketThrottle(TokenBucketThrottle):
+    """Limits unsafe methods only; reads fall under the user/anon buckets."""
+
+    def get_cache_key(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        return f'{self.scope}:{self.get_requester_ident(request)}'
+
+
+class CartWriteThrottle(WriteTokenBucketThrottle):
+    scope = 'cart_write'
+
+
+class ReviewWriteThrottle(WriteTokenBucketThrottle):
+    scope = 'review_write'
+
+
+class TokenObtainThrottle(TokenBucketThrottle):
+    """Limits password checks per IP on the token endpoint."""
+    scope = 'token'
+
+    def get_cache_key(self, request, view):
+        return f'{self.scope}:{self.get_ident(request)}'
@@ -1,4 +1,7 @@
-from django.urls import path, include
+import re
+
+from django.conf import settings
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 
@@ -13,5 +16,26 @@ router.register(r'users', views.UserViewSet, basename='user')
 app_name = 'api'
 
 urlpatterns = [
+    path('auth/token/', views.TokenObtainView.as_view(), name='token_obtain'),
+    path('auth/token/revoke/', views.TokenRevokeView.as_view(), name='token_revoke'),
+    path('cache/stats/', views.ResponseCacheStatsView.as_view(), name='cache_stats'),
+]
+
+if settings.ASYNC_CATALOG_VIEWS:
+    from . import async_views
+
+    product_actions = '|'.join(
+        re.escape(extra_action.url_path) for extra_action in views.ProductViewSet.get_extra_actions()
+    )
+    urlpatterns += [
+        path('products/', async_views.product_list, name='product-list'),
+        re_path(
+            rf'^products/(?!(?:{product_actions})/)(?P<slug>[^/.]+)/$',
+            async_views.product_detail,
+            name='product-detail',
+        ),
+    ]
+
+urlpatterns += [
     path('', include(router.urls)),
 ]
@@ -0,0 +1,122 @@
+from django.db import models
+from products.models import Product
+from .serializers import ProductListSerializer
+
+
+class ValuesSerializer:
+    """
+    Serializes rows fetched with ``values_list()`` instead of model instances.
+
+    Field output is produced by the DRF fields of ``serializer_class`` so the
+    payload is identical to the regular serializer, but no model objects are
+    built and only the columns needed for the requested fields are selected.
+    """
+    serializer_class = None
+    # name -> (columns it depends on, function taking a row dict)
+    computed_fields = {}
+    # name -> name of a method that loads values for a list of primary keys
+    related_fields = {}
+
+    def __init__(self, fields=None, context=None):
+        self.context = context or {}
+        self.serializer = self.serializer_class(context=self.context)
+        names = list(self.serializer.fields)
+        if fields:
+            names = [name for name in names if name in fields]
+        self.field_names = names
+
+        model = self.serializer_class.Meta.model
+        self.model_fields = {}
+        columns = ['pk']
+        for name in self.field_names:
+            if name in self.computed_fields:
+                columns.extend(self.computed_fields[name][0])
+            elif name not in self.related_fields:
+                source = self.serializer.fields[name].source
+                columns.append(source)
+                self.model_fields[source] = model._meta.get_field(source)
+        self.columns = list(dict.fromkeys(columns))
+
+    def reset(self):
+        pass
+
+    def values(self, queryset):
+        return queryset.prefetch_related(None).values_list(*self.columns)
+
+    def _column_value(self, column, value):
+        model_field = self.model_fields.get(column)
+        if value and isinstance(model_field, models.FileField):
+            return model_field.attr_class(None, model_field, value)
+        return value
+
+    def serialize(self, rows):
+        rows = [dict(zip(self.columns, row)) for row in rows]
+        self.reset()
+        related = {
+            name: getattr(self, self.related_fields[name])([row['pk'] for row in rows])
+            for name in self.field_names if name in self.related_fields
+        }
+        fields = self.serializer.fields
+
+        data = []
+        for row in rows:
+            item = {}
+            for name in self.field_names:
+                if name in self.computed_fields:
+                    value = self.computed_fields[name][1](row)
+                elif name in related:
+                    item[name] = related[name].get(row['pk'], [])
+                    continue
+                else:
+                    source = fields[name].source
+                    value = self._column_value(source, row[source])
+                item[name] = None if value is None else fields[name].to_representation(value)
+            data.append(item)
+        return data
+
+
+def _current_price(row):
+    return row['discount_price'] if row['discount_price'] else row['price']
+
+
+def _discount_percentage(row):
+    if row['discount_price']:
+        return int(((row['price'] - row['discount_price']) / row['price']) * 100)
+    return 0
+
+
+class ProductValuesSerializer(ValuesSerializer):
+    serializer_class = ProductListSerializer
+    computed_fields = {
+        'current_price': (('price', 'discount_price'), _current_price),
+        'discount_percentage': (('price', 'discount_price'), _discount_percentage),
+    }
+    related_fields = {
+        'categories': 'load_category_ids',
+        'category_names': 'load_category_names',
+    }
+
+    def reset(self):
+        self._categories = None
+
+    def _load_categories(self, pks):
+        if self._categories is None:
+            self._categories = {}
+            memberships = Product.categories.through.objects.filter(
+                product_id__in=pks
+            ).order_by('category__name').values_list('product_id', 'category_id', 'category__name')
+            for product_id, category_id, category_name in memberships:
+                self._categories.setdefault(product_id, []).append((category_id, category_name))
+        return self._categories
+
+    def load_category_ids(self, pks):
+        return {
+            pk: [category_id for category_id, _ in categories]
+            for pk, categories in self._load_categories(pks).items()
+        }
+
+    def load_category_names(self, pks):
+        return {
+            pk: [name for _, name in categories]
+            for pk, categories in self._load_categories(pks).items()
+        }
@@ -1,41 +1,229 @@
 from rest_framework import viewsets, filters, status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Q
+from django.urls import reverse
+from django.utils.http import urlencode
+from products.cache import get_catalog_version
+from products.facets import apply_facet_filters, facet_counts, parse_facet_filters
+from products.suggest import get_suggest_index
+from products import trending
 from products.models import Category, Product
 from reviews.models import Review
 from orders.models import Order, Cart, CartItem
+from users.models import get_user_profile
+from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
+from .authentication import make_token, revoke_tokens
+from .renderers import FastJSONRenderer
+from .exports import IgnoreClientContentNegotiation, export_orders, export_products
+from .cache import AnonymousResponseCacheMixin, get_response_cache_stats
+from .filters import FuzzySearchFilter, ProductFilter, SearchRankOrderingFilter
+from .mixins import CatalogVersionStateMixin, ConditionalGetMixin, ValuesListMixin
+from .throttling import CartWriteThrottle, ReviewWriteThrottle, SearchThrottle, TokenObtainThrottle
 from .serializers import (
     CategorySerializer,
     ProductListSerializer,
     ProductDetailSerializer,
     ReviewSerializer,
+    get_requested_fields,
     OrderListSerializer,
     OrderDetailSerializer,
     CartSerializer,
     UserSerializer,
 )
+from .values import ProductValuesSerializer
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(CatalogVersionStateMixin, ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     lookup_field = 'slug'
 
 
-class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+class ProductViewSet(
+    CatalogVersionStateMixin,
+    ConditionalGetMixin,
+    AnonymousResponseCacheMixin,
+    ValuesListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = Product.objects.filter(is_active=True)
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'is_featured']
+    filter_backends = [DjangoFilterBackend, FuzzySearchFilter, SearchRankOrderingFilter]
+    filterset_class = ProductFilter
     search_fields = ['name', 'description', 'brand']
-    ordering_fields = ['created_at', 'price', 'views_count']
+    ordering_fields = ['created_at', 'price', 'effective_price', 'discount_percent', 'views_count', 'trending_score']
     ordering = ['-created_at']
     lookup_field = 'slug'
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES + [SearchThrottle]
+    values_serializer_class = ProductValuesSerializer
+    max_bulk_ids = 200
+    bulk_fields = ('id', 'slug', 'name', 'price', 'discount_price', 'current_price', 'stock', 'image')
+    availability_fields = ('id', 'price', 'current_price', 'stock')
+    cache_query_params = AnonymousResponseCacheMixin.cache_query_params + (
+        'fields', 'min_price', 'max_price', 'min_discount', 'brand', 'size', 'color', 'material', 'price',
+        'family',
+    )
+    # Counters and scores updated without a catalog version bump; lists
+    # ordered by them get no validators and skip the anonymous response cache.
+    volatile_ordering_fields = ('views_count', 'trending_score')
+    # Filters the facet index cannot apply itself; ``category`` is an id
+    # here, so it is one of them.
+    facet_base_params = ('search', 'category', 'is_featured', 'min_price', 'max_price', 'min_discount', 'family')
+    detail_volatile_fields = ('updated_at', 'stock', 'views_count')
+    # Approved reviews feed ``avg_rating``.
+    detail_related_states = (('reviews', 'updated_at'),)
+
+    def get_queryset(self):
+        queryset = Product.objects.filter(is_active=True)
+        if self.action != 'retrieve':
+            return queryset
+
+        fields = get_requested_fields(self.request)
+        if fields is None or fields & {'categories', 'category_names'}:
+            queryset = queryset.prefetch_related('categories')
+        if fields is None or 'images' in fields:
+            queryset = queryset.prefetch_related('images')
+        if fields is None or 'avg_rating' in fields:
+            queryset = queryset.annotate(
+                approved_avg_rating=Avg('reviews__rating', filter=Q(reviews__is_approved=True))
+            )
+        if fields:
+            queryset = queryset.only(*self.get_detail_columns(fields))
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list':
+            queryset = apply_facet_filters(
+                queryset, parse_facet_filters(self.request.query_params, exclude=('category',))
+            )
+        return queryset
+
+    def has_volatile_ordering(self):
+        ordering = self.request.query_params.get(api_settings.ORDERING_PARAM, '')
+        return any(
+            field.strip().lstrip('-') in self.volatile_ordering_fields for field in ordering.split(',')
+        )
+
+    def is_list_conditional(self, request):
+        return not self.has_volatile_ordering()
+
+    def is_response_cacheable(self, request):
+        return super().is_response_cacheable(request) and not self.has_volatile_ordering()
+
+    def get_detail_columns(self, fields):
+        columns = {field.name for field in Product._meta.concrete_fields} & fields
+        if fields & {'current_price', 'discount_percentage'}:
+            columns |= {'price', 'discount_price'}
+        return columns | {'id', 'slug'}
+
+    def get_state_queryset(self):
+        return Product.objects.filter(is_active=True)
+
+    def get_bulk_ids(self):
+        raw = self.request.query_params.get('ids', '')
+        try:
+            ids = sorted({int(value) for value in raw.split(',') if value.strip()})
+        except ValueError:
+            raise ValidationError({'ids': 'Expected a comma separated list of product ids.'})
+        if not ids:
+            raise ValidationError({'ids': 'This parameter is required.'})
+        if len(ids) > self.max_bulk_ids:
+            raise ValidationError({'ids': f'At most {self.max_bulk_ids} ids are allowed per request.'})
+        return ids
+
+    def get_bulk_data(self, name, fields):
+        ids = self.get_bulk_ids()
+        key = 'api:products:{}:{}:{}:{}'.format(
+            name, get_catalog_version(), self.request.get_host(), ','.join(map(str, ids))
+        )
+        data = cache.get(key)
+        if data is None:
+            serializer = ProductValuesSerializer(fields=set(fields), context=self.get_serializer_context())
+            queryset = Product.objects.filter(is_active=True, pk__in=ids).order_by('pk')
+            data = serializer.serialize(serializer.values(queryset))
+            cache.set(key, data, settings.API_AVAILABILITY_CACHE_TIMEOUT)
+        return data
+
+    @action(detail=False, methods=['get'])
+    def bulk(self, request):
+        data = self.get_bulk_data('bulk', self.bulk_fields)
+        return Response({'count': len(data), 'results': data})
+
+    @action(detail=False, methods=['get'])
+    def availability(self, request):
+        data = self.get_bulk_data('availability', self.availability_fields)
+        for item in data:
+            item['is_in_stock'] = item['stock'] > 0
+        return Response({'count': len(data), 'results': data})
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Facet counts for the same filters as the list."""
+        base = None
+        if any(request.query_params.get(name) for name in self.facet_base_params):
+            base = super().filter_queryset(self.get_queryset())
+        selected = parse_facet_filters(request.query_params, exclude=('category',))
+        return Response(facet_counts(selected, base))
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """Prefix suggestions for ``?q=``, from memory."""
+        try:
+            limit = min(int(request.query_params.get('limit', 8)), 20)
+        except ValueError:
+            raise ValidationError({'limit': 'Expected an integer.'})
+        query = request.query_params.get('q', '')
+        results = []
+        for kind, label, slug, weight in get_suggest_index().suggest(query, limit):
+            if kind == 'product':
+                url = reverse('products:product_detail', args=[slug])
+            elif kind == 'category':
+                url = reverse('products:category', args=[slug])
+            else:
+                url = f"{reverse('products:product_list')}?{urlencode({'brand': slug})}"
+            results.append({'type': kind, 'label': label, 'url': url})
+        return Response({'query': query, 'results': results})
+
+    @action(detail=True, methods=['get'])
+    def variants(self, request, slug=None):
+        """Sizes and colors of the product's family with their stock."""
+        results = []
+        for row in Product.variants_of(slug=slug).values(
+            'id', 'slug', 'size', 'color', 'effective_price', 'stock'
+        ):
+            results.append({
+                'id': row['id'],
+                'slug': row['slug'],
+                'size': row['size'],
+                'color': row['color'],
+                'current_price': row['effective_price'],
+                'stock': row['stock'],
+                'is_in_stock': row['stock'] > 0,
+            })
+        if not results:
+            raise NotFound()
+        return Response({'count': len(results), 'results': results})
+
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[FastJSONRenderer],
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def export(self, request):
+        return export_products(request)
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -43,10 +231,11 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         return ProductListSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Review.objects.filter(is_approved=True)
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES + [ReviewWriteThrottle]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['product', 'rating']
     ordering = ['-created_at']
@@ -75,9 +264,25 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
             return OrderDetailSerializer
         return OrderListSerializer
 
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[FastJSONRenderer],
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def export(self, request):
+        queryset = self.get_queryset()
+        if request.query_params.get('scope') == 'all':
+            if not request.user.is_staff:
+                raise PermissionDenied('Only staff can export all orders.')
+            queryset = Order.objects.all()
+        logger.info(f"Orders export started by {request.user.username}")
+        return export_orders(request, queryset)
+
 
 class CartViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES + [CartWriteThrottle]
 
     def list(self, request):
         cart, created = Cart.objects.get_or_create(user=request.user)
@@ -116,6 +321,7 @@ class CartViewSet(viewsets.ViewSet):
             cart_item.quantity += quantity
             cart_item.save()
 
+        trending.record(product.pk, 'cart')
         logger.info(f"Item added to cart for {request.user.username}")
         serializer = CartSerializer(cart)
         return Response(serializer.data)
@@ -151,5 +357,45 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['get'])
     def me(self, request):
+        get_user_profile(request.user)
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
+
+
+class TokenObtainView(APIView):
+    permission_classes = []
+    authentication_classes = []
+    throttle_classes = [TokenObtainThrottle]
+
+    def post(self, request):
+        user = authenticate(
+            request,
+            username=request.data.get('username'),
+            password=request.data.get('password'),
+        )
+        if user is None:
+            return Response(
+                {'error': 'Invalid username or password'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        logger.info(f"API token issued for {user.username}")
+        return Response({
+            'token': make_token(user),
+            'expires_in': settings.API_TOKEN_MAX_AGE,
+        })
+
+
+class TokenRevokeView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        revoke_tokens(request.user)
+        logger.info(f"API tokens revoked for {request.user.username}")
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ResponseCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_response_cache_stats())
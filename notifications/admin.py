@@ -0,0 +1,46 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import NewsletterCampaign, OutboundEmail
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'kind',
+        'to_email',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt_at',
+        'created_at',
+    )
+    list_filter = ('status', 'kind', 'created_at')
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'attempts', 'last_error')
+    actions = ['retry_emails']
+
+    def retry_emails(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} email(s) queued for retry.')
+    retry_emails.short_description = 'Retry selected emails'
+
+
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'template_name',
+        'status',
+        'recipients_count',
+        'created_at',
+        'finished_at',
+    )
+    list_filter = ('status',)
+    readonly_fields = ('last_user_id', 'recipients_count', 'created_at', 'finished_at')
+
+
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
+admin.site.register(NewsletterCampaign, NewsletterCampaignAdmin)
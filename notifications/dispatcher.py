@@ -0,0 +1,124 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import OutboundEmail
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Claimed emails are retried after this long if the worker dies mid-batch.
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+class EmailDispatcher:
+    """
+    Sends due outbox emails in batches, one mail connection per batch.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` and leased,
+    so several workers can run side by side. Failed sends are retried with
+    exponential backoff until ``EMAIL_OUTBOX_MAX_ATTEMPTS``.
+    """
+
+    def __init__(self, batch_size=100, backend=None):
+        self.batch_size = batch_size
+        self.backend = backend
+        self.max_attempts = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        self.retry_delay = settings.EMAIL_OUTBOX_RETRY_DELAY
+
+    def claim(self):
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True).filter(
+                    status='pending', next_attempt_at__lte=now
+                ).order_by('next_attempt_at', 'pk')[:self.batch_size]
+            )
+            if batch:
+                OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                    attempts=F('attempts') + 1, next_attempt_at=now + CLAIM_LEASE
+                )
+        for email in batch:
+            email.attempts += 1
+        return batch
+
+    def get_retry_delay(self, attempts):
+        delay = min(self.retry_delay * 2 ** (attempts - 1), 3600)
+        return timedelta(seconds=delay * random.uniform(0.75, 1.25))
+
+    def mark_failed(self, email, exc):
+        email.last_error = f'{type(exc).__name__}: {exc}'
+        if email.attempts >= self.max_attempts:
+            email.status = 'failed'
+            logger.error(f"Giving up on email {email.pk} to {email.to_email}: {email.last_error}")
+        else:
+            email.next_attempt_at = timezone.now() + self.get_retry_delay(email.attempts)
+            logger.warning(f"Email {email.pk} to {email.to_email} failed, retrying: {email.last_error}")
+
+    def build_message(self, email, connection):
+        message = EmailMultiAlternatives(
+            email.subject,
+            email.body,
+            email.from_email or None,
+            [email.to_email],
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        return message
+
+    def send(self, batch):
+        connection = get_connection(self.backend)
+        sent = failed = 0
+        try:
+            connection.open()
+        except Exception as exc:
+            for email in batch:
+                self.mark_failed(email, exc)
+            failed = len(batch)
+        else:
+            try:
+                for index, email in enumerate(batch):
+                    try:
+                        connection.send_messages([self.build_message(email, connection)])
+                    except Exception as exc:
+                        self.mark_failed(email, exc)
+                        failed += 1
+                        # The connection may be unusable now; start a fresh one.
+                        try:
+                            connection.close()
+                            connection.open()
+                        except Exception as exc:
+                            for rest in batch[index + 1:]:
+                                self.mark_failed(rest, exc)
+                            failed += len(batch) - index - 1
+                            break
+                    else:
+                        email.status = 'sent'
+                        email.sent_at = timezone.now()
+                        email.last_error = ''
+                        sent += 1
+            finally:
+                connection.close()
+
+        OutboundEmail.objects.bulk_update(
+            batch, ['status', 'sent_at', 'next_attempt_at', 'last_error']
+        )
+        return sent, failed
+
+    def run(self, max_batches=None):
+        """Sends until nothing is due; returns (sent, failed) counts."""
+        sent = failed = batches = 0
+        while max_batches is None or batches < max_batches:
+            batch = self.claim()
+            if not batch:
+                break
+            batch_sent, batch_failed = self.send(batch)
+            sent += batch_sent
+            failed += batch_failed
+            batches += 1
+        return sent, failed
@@ -0,0 +1,31 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand
+from notifications.newsletter import iter_audience_batches
+
+
+class Command(BaseCommand):
+    help = 'Writes newsletter subscribers (email, name, city) as CSV, in user id order.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File to write; defaults to stdout.')
+        parser.add_argument('--after', type=int, default=0, help='Resume after this user id.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            writer = csv.writer(output)
+            writer.writerow(['user_id', 'email', 'first_name', 'last_name', 'city'])
+            rows = 0
+            for batch in iter_audience_batches(options['after'], options['batch_size']):
+                writer.writerows(
+                    [row['user_id'], row['user__email'], row['user__first_name'], row['user__last_name'], row['city'] or '']
+                    for row in batch
+                )
+                rows += len(batch)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        self.stderr.write(f'{rows} subscribers exported')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from notifications.dispatcher import EmailDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Sends pending outbox emails in batches over a reused mail connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new emails.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop.')
+        parser.add_argument(
+            '--backend', default=None,
+            help='Email backend to use instead of EMAIL_BACKEND, e.g. django.core.mail.backends.console.EmailBackend.',
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = EmailDispatcher(batch_size=options['batch_size'], backend=options['backend'])
+        while True:
+            started = time.perf_counter()
+            sent, failed = dispatcher.run()
+            if sent or failed or not options['loop']:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Sent {sent}, failed {failed} in {elapsed:.1f}s '
+                    f'({sent / elapsed if elapsed else 0:,.0f} emails/s)'
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('template_name', models.CharField(default='newsletter', max_length=100)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('finished', 'Finished')], default='running', max_length=10)),
+                ('last_user_id', models.PositiveBigIntegerField(default=0, help_text='Checkpoint: recipients up to this user id are already queued')),
+                ('recipients_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Newsletter Campaign',
+                'verbose_name_plural': 'Newsletter Campaigns',
+                'db_table': 'newsletter_campaign',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
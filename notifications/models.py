@@ -0,0 +1,91 @@
+from django.db import models
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(
+        max_length=50,
+        help_text='What triggered the email, e.g. order_confirmation'
+    )
+    to_email = models.EmailField()
+    from_email = models.CharField(
+        max_length=254,
+        blank=True
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        db_table = 'outbound_email'
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.to_email} ({self.status})"
+
+
+class NewsletterCampaign(models.Model):
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('finished', 'Finished'),
+    ]
+
+    name = models.CharField(
+        max_length=100,
+        unique=True
+    )
+    template_name = models.CharField(
+        max_length=100,
+        default='newsletter'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='running'
+    )
+    last_user_id = models.PositiveBigIntegerField(
+        default=0,
+        help_text='Checkpoint: recipients up to this user id are already queued'
+    )
+    recipients_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        db_table = 'newsletter_campaign'
+        verbose_name = 'Newsletter Campaign'
+        verbose_name_plural = 'Newsletter Campaigns'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,26 @@
+from users.models import UserProfile
+
+AUDIENCE_COLUMNS = ('user_id', 'user__email', 'user__first_name', 'user__last_name', 'city')
+
+
+def audience_queryset():
+    return UserProfile.objects.filter(
+        is_newsletter_subscriber=True,
+        user__is_active=True,
+    ).exclude(user__email='')
+
+
+def iter_audience_batches(after=0, batch_size=1000):
+    """
+    Yields lists of subscriber rows ordered by user id, one keyset query per
+    batch, so memory stays bounded and a run can resume after ``after``.
+    """
+    queryset = audience_queryset().values(*AUDIENCE_COLUMNS).order_by('user_id')
+    while True:
+        batch = list(queryset.filter(user_id__gt=after)[:batch_size].iterator())
+        if not batch:
+            return
+        yield batch
+        after = batch[-1]['user_id']
+        if len(batch) < batch_size:
+            return
@@ -0,0 +1,36 @@
+from django.template.loader import render_to_string
+from .models import OutboundEmail
+
+
+def render_email(template_name, context):
+    """Renders ``emails/<name>_subject.txt`` and ``emails/<name>.txt``."""
+    subject = render_to_string(f'emails/{template_name}_subject.txt', context)
+    body = render_to_string(f'emails/{template_name}.txt', context)
+    return ' '.join(subject.split()), body
+
+
+def build_email(kind, to_email, template_name, context):
+    subject, body = render_email(template_name, context)
+    return OutboundEmail(kind=kind, to_email=to_email, subject=subject, body=body)
+
+
+def enqueue_email(kind, to_email, template_name, context):
+    """
+    Stores the rendered email in the outbox; the send_outbox worker delivers
+    it. Call it inside the transaction that makes the change it reports.
+    """
+    if not to_email:
+        return None
+    email = build_email(kind, to_email, template_name, context)
+    email.save()
+    return email
+
+
+def build_order_email(order, kind, items=None):
+    """``items`` are dicts with ``name``, ``quantity`` and ``subtotal``."""
+    return build_email(
+        kind,
+        order.user.email,
+        kind,
+        {'order': order, 'user': order.user, 'items': items},
+    )
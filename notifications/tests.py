@@ -0,0 +1,153 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends.locmem import EmailBackend as LocMemEmailBackend
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from .dispatcher import CLAIM_LEASE, EmailDispatcher
+from .management.commands import send_newsletter
+from .models import NewsletterCampaign, OutboundEmail
+from .newsletter import iter_audience_batches
+
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class FailingEmailBackend(LocMemEmailBackend):
+    """Refuses every message sent to an address starting with ``fail``."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0].startswith('fail'):
+                raise ConnectionError('mailbox unavailable')
+        return super().send_messages(messages)
+
+
+def make_email(to_email='buyer@example.com', **fields):
+    return OutboundEmail.objects.create(
+        kind='order_confirmation', to_email=to_email, subject='Your order', body='Thanks!', **fields
+    )
+
+
+@override_settings(EMAIL_BACKEND=LOCMEM_BACKEND, EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_RETRY_DELAY=60)
+class EmailDispatcherTests(TestCase):
+    failing_backend = f'{__name__}.FailingEmailBackend'
+
+    def test_sends_due_emails(self):
+        email = make_email(html_body='<p>Thanks!</p>')
+        make_email('later@example.com', next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(EmailDispatcher().run(), (1, 0))
+        self.assertEqual([message.to for message in mail.outbox], [['buyer@example.com']])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('sent', 1))
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 1)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        email = make_email('fail@example.com')
+        make_email()
+        with mock.patch('notifications.dispatcher.random.uniform', return_value=1.0):
+            self.assertEqual(EmailDispatcher(backend=self.failing_backend).run(), (1, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ('pending', 1))
+            self.assertEqual(email.last_error, 'ConnectionError: mailbox unavailable')
+            self.assertAlmostEqual(
+                (email.next_attempt_at - timezone.now()).total_seconds(), 60, delta=5
+            )
+
+            # Not due yet, so the next run leaves it alone.
+            self.assertEqual(EmailDispatcher(backend=self.failing_backend).run(), (0, 0))
+
+            OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+            EmailDispatcher(backend=self.failing_backend).run()
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, 2)
+            self.assertAlmostEqual(
+                (email.next_attempt_at - timezone.now()).total_seconds(), 120, delta=5
+            )
+
+    def test_gives_up_after_max_attempts(self):
+        email = make_email('fail@example.com', attempts=2)
+        self.assertEqual(EmailDispatcher(backend=self.failing_backend).run(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('failed', 3))
+        self.assertEqual(EmailDispatcher(backend=self.failing_backend).run(), (0, 0))
+
+    def test_claim_leases_the_batch(self):
+        emails = [make_email(f'buyer{index}@example.com') for index in range(3)]
+        dispatcher = EmailDispatcher(batch_size=2)
+
+        batch = dispatcher.claim()
+        self.assertEqual([email.pk for email in batch], [email.pk for email in emails[:2]])
+        self.assertEqual([email.attempts for email in batch], [1, 1])
+        leased = OutboundEmail.objects.get(pk=emails[0].pk)
+        self.assertGreater(leased.next_attempt_at, timezone.now() + CLAIM_LEASE - timedelta(minutes=1))
+
+        # A second worker only gets what the first one did not claim.
+        self.assertEqual([email.pk for email in dispatcher.claim()], [emails[2].pk])
+        self.assertEqual(dispatcher.claim(), [])
+
+
+@override_settings(EMAIL_BACKEND=LOCMEM_BACKEND)
+class EmailClaimConcurrencyTests(TransactionTestCase):
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_claim_skips_rows_locked_by_another_worker(self):
+        emails = [make_email(f'buyer{index}@example.com') for index in range(4)]
+        claimed = []
+
+        def other_worker():
+            try:
+                claimed.extend(email.pk for email in EmailDispatcher(batch_size=4).claim())
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            list(OutboundEmail.objects.select_for_update().filter(pk__in=[emails[0].pk, emails[1].pk]))
+            worker = threading.Thread(target=other_worker)
+            worker.start()
+            worker.join()
+
+        self.assertEqual(claimed, [emails[2].pk, emails[3].pk])
+
+
+class SendNewsletterTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(f'subscriber{index}', f'subscriber{index}@example.com')
+            for index in range(5)
+        ]
+
+    def send(self, **options):
+        call_command('send_newsletter', 'spring', batch_size=2, workers=1, stdout=StringIO(), **options)
+
+    def test_queues_every_subscriber_once(self):
+        self.send()
+        self.send()
+        self.assertEqual(
+            sorted(OutboundEmail.objects.values_list('to_email', flat=True)),
+            [user.email for user in self.users],
+        )
+        campaign = NewsletterCampaign.objects.get(name='spring')
+        self.assertEqual((campaign.status, campaign.recipients_count), ('finished', 5))
+
+    def test_stops_when_another_run_moves_the_checkpoint(self):
+        def batches_racing_another_run(after, batch_size):
+            for batch in iter_audience_batches(after, batch_size):
+                # Another run queues the same batch while this one renders it.
+                NewsletterCampaign.objects.filter(name='spring').update(
+                    last_user_id=batch[-1]['user_id'], recipients_count=len(batch)
+                )
+                yield batch
+
+        with mock.patch(f'{send_newsletter.__name__}.iter_audience_batches', batches_racing_another_run):
+            self.send()
+        campaign = NewsletterCampaign.objects.get(name='spring')
+        self.assertFalse(OutboundEmail.objects.exists())
+        self.assertEqual((campaign.status, campaign.last_user_id), ('running', self.users[1].pk))
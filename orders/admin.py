@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Order, OrderItem, Cart, CartItem
+from .models import Order, OrderItem, Cart, CartItem, OrderEvent, SalesRollup
 import logging
 
 logger = logging.getLogger(__name__)
@@ -154,7 +154,40 @@ class CartItemAdmin(admin.ModelAdmin):
     readonly_fields = ('added_at', 'updated_at')
 
 
+class OrderEventAdmin(admin.ModelAdmin):
+    list_display = (
+        'order',
+        'event_type',
+        'attempts',
+        'created_at',
+        'processed_at',
+    )
+    list_filter = ('event_type', 'processed_at')
+    search_fields = ('order__order_number',)
+    readonly_fields = ('order', 'event_type', 'payload', 'attempts', 'last_error', 'created_at', 'processed_at')
+    actions = ['retry_events']
+
+    def retry_events(self, request, queryset):
+        updated = queryset.filter(processed_at__isnull=True).update(attempts=0, last_error='')
+        self.message_user(request, f'{updated} event(s) queued for retry.')
+    retry_events.short_description = 'Retry selected events'
+
+
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        'date',
+        'orders_count',
+        'items_count',
+        'revenue',
+        'updated_at',
+    )
+    date_hierarchy = 'date'
+    readonly_fields = ('date', 'orders_count', 'items_count', 'revenue', 'updated_at')
+
+
 admin.site.register(Order, OrderAdmin)
 admin.site.register(OrderItem, OrderItemAdmin)
 admin.site.register(Cart, CartAdmin)
 admin.site.register(CartItem, CartItemAdmin)
+admin.site.register(OrderEvent, OrderEventAdmin)
+admin.site.register(SalesRollup, SalesRollupAdmin)
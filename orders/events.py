@@ -0,0 +1,227 @@
+"""
+Order event outbox.
+
+Checkout and payment views record an ``OrderEvent`` inside the transaction
+that changes the order, built from data already in memory. The
+``dispatch_order_events`` command hands pending events to the handlers below
+in batches, so side effects (logging, emails, sales rollups, stock) cost the
+checkout request nothing and each batch costs a fixed number of queries.
+"""
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+from notifications.models import OutboundEmail
+from notifications.outbox import build_order_email
+from products.cache import bump_catalog_version
+from products.models import Product
+from products.trending import WEIGHTS, add_points, decay_factor
+from .models import Order, OrderEvent, SalesRollup
+import logging
+
+logger = logging.getLogger(__name__)
+
+# event type -> handlers, each called with the list of events of that type
+HANDLERS = defaultdict(list)
+
+EMAIL_KINDS = {
+    'created': 'order_confirmation',
+    'paid': 'order_paid',
+    'status_changed': 'order_status',
+}
+
+
+def handles(*event_types):
+    def decorator(func):
+        for event_type in event_types:
+            HANDLERS[event_type].append(func)
+        return func
+    return decorator
+
+
+def record_event(order, event_type, **payload):
+    payload['order_number'] = order.order_number
+    return OrderEvent.objects.create(order=order, event_type=event_type, payload=payload)
+
+
+def record_order_created(order, items):
+    """``items`` are the new ``OrderItem`` objects, with their products loaded."""
+    return record_event(
+        order,
+        'created',
+        user_id=order.user_id,
+        final_amount=str(order.final_amount),
+        date=timezone.localdate(order.created_at).isoformat(),
+        items=[
+            {
+                'product_id': item.product_id,
+                'name': item.product.name,
+                'quantity': item.quantity,
+                'subtotal': str(item.subtotal),
+            }
+            for item in items
+        ],
+    )
+
+
+@handles('created', 'paid', 'status_changed')
+def log_events(events):
+    for event in events:
+        payload = event.payload
+        if event.event_type == 'created':
+            for item in payload['items']:
+                logger.info(
+                    f"OrderItem added to order {payload['order_number']}: "
+                    f"{item['name']} x {item['quantity']}"
+                )
+        elif event.event_type == 'paid':
+            logger.info(f"Order {payload['order_number']} paid via {payload['payment_method']}")
+        else:
+            logger.info(f"Order {payload['order_number']} status changed to: {payload['status']}")
+
+
+@handles('created', 'paid', 'status_changed')
+def send_emails(events):
+    orders = Order.objects.select_related('user').in_bulk({event.order_id for event in events})
+    emails = []
+    for event in events:
+        order = orders.get(event.order_id)
+        if order is None or not order.user.email:
+            continue
+        emails.append(build_order_email(order, EMAIL_KINDS[event.event_type], event.payload.get('items')))
+    OutboundEmail.objects.bulk_create(emails)
+
+
+@handles('created')
+def update_sales_rollups(events):
+    totals = defaultdict(lambda: [0, 0, Decimal(0)])
+    for event in events:
+        row = totals[date.fromisoformat(event.payload['date'])]
+        row[0] += 1
+        row[1] += sum(item['quantity'] for item in event.payload['items'])
+        row[2] += Decimal(event.payload['final_amount'])
+
+    for day, (orders_count, items_count, revenue) in totals.items():
+        SalesRollup.objects.get_or_create(date=day)
+        SalesRollup.objects.filter(date=day).update(
+            orders_count=F('orders_count') + orders_count,
+            items_count=F('items_count') + items_count,
+            revenue=F('revenue') + revenue,
+            updated_at=timezone.now(),
+        )
+
+
+@handles('created')
+def sync_stock(events):
+    sold = defaultdict(int)
+    for event in events:
+        for item in event.payload['items']:
+            sold[item['product_id']] += item['quantity']
+    if not sold:
+        return
+
+    Product.objects.filter(pk__in=sold).update(
+        stock=Greatest(
+            F('stock') - Case(
+                *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in sold.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        # Stock is part of the product's API responses and their ETags.
+        updated_at=Now(),
+    )
+    # Queryset updates skip the signals that version the catalog cache.
+    transaction.on_commit(bump_catalog_version)
+
+
+@handles('created')
+def update_trending(events):
+    points = defaultdict(float)
+    for event in events:
+        # Decayed from when the order was placed, not when it is dispatched.
+        factor = WEIGHTS['order'] * decay_factor(event.created_at)
+        for item in event.payload['items']:
+            points[item['product_id']] += item['quantity'] * factor
+    add_points(points)
+
+
+class OrderEventDispatcher:
+    """
+    Processes pending events in batches, oldest first.
+
+    A batch is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` and handled
+    in the same transaction, so the database side effects and the
+    ``processed_at`` mark commit together. If a handler fails, the batch is
+    retried one event at a time and only the failing events are kept for the
+    next run, up to ``ORDER_EVENT_MAX_ATTEMPTS``.
+    """
+
+    def __init__(self, batch_size=200):
+        self.batch_size = batch_size
+        self.max_attempts = settings.ORDER_EVENT_MAX_ATTEMPTS
+        # Events that failed during this run; they wait for the next one.
+        self.failed_ids = set()
+
+    def handle(self, events):
+        by_type = defaultdict(list)
+        for event in events:
+            by_type[event.event_type].append(event)
+        for event_type, typed_events in by_type.items():
+            for handler in HANDLERS[event_type]:
+                handler(typed_events)
+
+    def process_batch(self):
+        with transaction.atomic():
+            batch = list(
+                OrderEvent.objects.select_for_update(skip_locked=True).filter(
+                    processed_at__isnull=True, attempts__lt=self.max_attempts
+                ).exclude(pk__in=self.failed_ids).order_by('pk')[:self.batch_size]
+            )
+            if not batch:
+                return 0, 0
+
+            now = timezone.now()
+            failed = 0
+            try:
+                with transaction.atomic():
+                    self.handle(batch)
+            except Exception:
+                logger.exception(f"Order event batch of {len(batch)} failed, retrying one by one")
+                for event in batch:
+                    try:
+                        with transaction.atomic():
+                            self.handle([event])
+                    except Exception as exc:
+                        event.attempts += 1
+                        event.last_error = f'{type(exc).__name__}: {exc}'
+                        failed += 1
+                        self.failed_ids.add(event.pk)
+                        logger.error(f"Order event {event.pk} failed: {event.last_error}")
+                    else:
+                        event.processed_at = now
+            else:
+                for event in batch:
+                    event.processed_at = now
+
+            OrderEvent.objects.bulk_update(batch, ['processed_at', 'attempts', 'last_error'])
+        return len(batch) - failed, failed
+
+    def run(self, max_batches=None):
+        """Processes until nothing is pending; returns (processed, failed) counts."""
+        self.failed_ids.clear()
+        processed = failed = batches = 0
+        while max_batches is None or batches < max_batches:
+            batch_processed, batch_failed = self.process_batch()
+            if not batch_processed and not batch_failed:
+                break
+            processed += batch_processed
+            failed += batch_failed
+            batches += 1
+        return processed, failed
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from orders.events import OrderEventDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Processes pending order events (logging, emails, sales rollups, stock) in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new events.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        dispatcher = OrderEventDispatcher(batch_size=options['batch_size'])
+        while True:
+            started = time.perf_counter()
+            processed, failed = dispatcher.run()
+            if processed or failed or not options['loop']:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Processed {processed}, failed {failed} in {elapsed:.1f}s '
+                    f'({processed / elapsed if elapsed else 0:,.0f} events/s)'
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,87 @@
+import time
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from orders.models import Cart, CartItem
+from orders.signals import abandoned_carts
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes carts untouched for --days, and expired sessions, in small '
+        'primary-key-ordered batches so no statement holds locks for long.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to pause between batches.')
+        parser.add_argument('--notify', action='store_true', help='Send the abandoned_carts signal.')
+        parser.add_argument('--skip-sessions', action='store_true')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        self.options = options
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # Cart.updated_at doesn't change when items do, so check the items too.
+        carts = Cart.objects.filter(updated_at__lt=cutoff).exclude(
+            Exists(CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=cutoff))
+        )
+        self.sweep('carts', carts, self.delete_carts)
+
+        if not options['skip_sessions']:
+            sessions = Session.objects.filter(expire_date__lt=timezone.now())
+            self.sweep('sessions', sessions, self.delete_sessions)
+
+    def sweep(self, label, queryset, delete_batch):
+        batch_size = self.options['batch_size']
+        last_pk = None
+        swept = rows = batches = 0
+        started = time.perf_counter()
+        while True:
+            batch = queryset.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            swept += len(pks)
+            if not self.options['dry_run']:
+                rows += delete_batch(queryset, pks)
+            batches += 1
+            if len(pks) < batch_size:
+                break
+            time.sleep(self.options['sleep'])
+
+        elapsed = time.perf_counter() - started
+        if self.options['dry_run']:
+            self.stdout.write(f'{label}: {swept} would be deleted')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'{label}: {swept} swept, {rows} rows deleted in {batches} batches, '
+            f'{elapsed:.1f}s ({rows / elapsed if elapsed else 0:,.0f} rows/s)'
+        ))
+
+    def delete_carts(self, carts, pks):
+        # The delete re-applies the cutoff, so a cart touched since the batch
+        # was picked is kept.
+        stale = carts.filter(pk__in=pks)
+        with transaction.atomic():
+            candidates = dict(stale.select_for_update().values_list('pk', 'user_id'))
+            rows, _ = stale.filter(pk__in=candidates).delete()
+            kept = set(Cart.objects.filter(pk__in=candidates).values_list('pk', flat=True))
+        if self.options['notify']:
+            abandoned_carts.send(
+                sender=Cart,
+                carts=[(pk, user_id) for pk, user_id in candidates.items() if pk not in kept],
+            )
+        return rows
+
+    def delete_sessions(self, sessions, pks):
+        deleted, _ = sessions.filter(pk__in=pks).delete()
+        return deleted
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('orders_count', models.IntegerField(default=0)),
+                ('items_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sales Rollup',
+                'verbose_name_plural': 'Sales Rollups',
+                'db_table': 'sales_rollup',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('created', 'Created'), ('paid', 'Paid'), ('status_changed', 'Status changed')], max_length=20)),
+                ('payload', models.JSONField(default=dict)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='orders.order')),
+            ],
+            options={
+                'verbose_name': 'Order Event',
+                'verbose_name_plural': 'Order Events',
+                'db_table': 'order_event',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='order_event_pending_idx')],
+            },
+        ),
+    ]
@@ -3,7 +3,6 @@ from django.contrib.auth.models import User
 from products.models import Product
 from django.core.validators import MinValueValidator
 from django.db.models import Sum, F, DecimalField
-from django.db.models.functions import Coalesce
 from django.db.models import ExpressionWrapper
 import logging
 
@@ -92,10 +91,20 @@ class Order(models.Model):
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_number} by {self.user.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the post_save receiver spot status changes without a query.
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
     def get_items_count(self):
         return self.items.aggregate(
             total=Sum('quantity')
@@ -157,13 +166,17 @@ class Cart(models.Model):
         db_table = 'cart'
         verbose_name = 'Cart'
         verbose_name_plural = 'Carts'
+        indexes = [
+            models.Index(fields=['updated_at'], name='cart_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Cart of {self.user.username}"
 
     def get_total_price(self):
-        unit_price_expr = Coalesce(F('product__discount_price'), F('product__price'))
-        total_expr = ExpressionWrapper(F('quantity') * unit_price_expr, output_field=DecimalField())
+        total_expr = ExpressionWrapper(
+            F('quantity') * F('product__effective_price'), output_field=DecimalField()
+        )
         return self.items.aggregate(
             total=Sum(total_expr)
         )['total'] or 0
@@ -196,11 +209,78 @@ class CartItem(models.Model):
         verbose_name = 'Cart Item'
         verbose_name_plural = 'Cart Items'
         unique_together = ('cart', 'product')
+        indexes = [
+            models.Index(fields=['updated_at'], name='cart_item_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} in {self.cart.user.username}'s cart"
 
     @property
     def subtotal(self):
-        price = self.product.discount_price if self.product.discount_price is not None else self.product.price
-        return price * self.quantity
+        return self.product.current_price * self.quantity
+
+
+class OrderEvent(models.Model):
+    """
+    Outbox of order changes, written in the same transaction as the change.
+
+    ``payload`` holds everything the handlers need, so processing an event
+    does not have to load the order again; see ``orders.events``.
+    """
+    TYPE_CHOICES = [
+        ('created', 'Created'),
+        ('paid', 'Paid'),
+        ('status_changed', 'Status changed'),
+    ]
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='events'
+    )
+    event_type = models.CharField(
+        max_length=20,
+        choices=TYPE_CHOICES
+    )
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        db_table = 'order_event'
+        verbose_name = 'Order Event'
+        verbose_name_plural = 'Order Events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_at', 'id'], name='order_event_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.order_id}"
+
+
+class SalesRollup(models.Model):
+    date = models.DateField(unique=True)
+    orders_count = models.IntegerField(default=0)
+    items_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sales_rollup'
+        verbose_name = 'Sales Rollup'
+        verbose_name_plural = 'Sales Rollups'
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"Sales on {self.date}"
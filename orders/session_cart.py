@@ -0,0 +1,117 @@
+from django.db import transaction
+from django.utils import timezone
+from products.models import Product
+from .models import Cart, CartItem
+import logging
+
+logger = logging.getLogger(__name__)
+
+CART_SESSION_KEY = 'cart'
+
+
+class SessionCartItem:
+    """The parts of ``CartItem`` the cart template uses; ``id`` is the product id."""
+
+    def __init__(self, product, quantity):
+        self.id = product.id
+        self.product = product
+        self.quantity = quantity
+
+    @property
+    def subtotal(self):
+        return self.product.current_price * self.quantity
+
+
+class SessionCart:
+    """
+    Cart of an anonymous visitor, kept in the session as
+    ``{"<product id>": quantity}`` and merged into ``Cart`` at login.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.lines = session.get(CART_SESSION_KEY, {})
+
+    def __len__(self):
+        return len(self.lines)
+
+    def _store(self, lines):
+        self.lines = lines
+        if lines:
+            self.session[CART_SESSION_KEY] = lines
+        else:
+            self.session.pop(CART_SESSION_KEY, None)
+
+    def get_quantity(self, product_id):
+        return self.lines.get(str(product_id), 0)
+
+    def set(self, product_id, quantity):
+        lines = dict(self.lines)
+        if quantity > 0:
+            lines[str(product_id)] = quantity
+        else:
+            lines.pop(str(product_id), None)
+        self._store(lines)
+
+    def remove(self, product_id):
+        self.set(product_id, 0)
+
+    def clear(self):
+        self._store({})
+
+    def get_items(self):
+        products = Product.objects.filter(is_active=True).in_bulk(
+            [int(product_id) for product_id in self.lines]
+        )
+        return [
+            SessionCartItem(products[int(product_id)], quantity)
+            for product_id, quantity in self.lines.items()
+            if int(product_id) in products
+        ]
+
+    def get_total_price(self, items):
+        return sum((item.subtotal for item in items), 0)
+
+    def get_total_items(self, items):
+        return sum(item.quantity for item in items)
+
+
+def merge_session_cart(session, user):
+    """
+    Moves the session cart into the user's ``Cart`` with one bulk update and
+    one bulk insert; quantities are added up and capped at the current stock.
+    """
+    session_cart = SessionCart(session)
+    if not session_cart:
+        return
+
+    quantities = {int(product_id): quantity for product_id, quantity in session_cart.lines.items()}
+    stock = dict(
+        Product.objects.filter(pk__in=quantities, is_active=True).values_list('pk', 'stock')
+    )
+    cart, created = Cart.objects.get_or_create(user=user)
+    existing = {
+        item.product_id: item
+        for item in CartItem.objects.filter(cart=cart, product_id__in=stock)
+    }
+
+    now = timezone.now()
+    to_update, to_create = [], []
+    for product_id, available in stock.items():
+        if product_id in existing:
+            item = existing[product_id]
+            item.quantity = min(item.quantity + quantities[product_id], max(available, item.quantity))
+            item.updated_at = now
+            to_update.append(item)
+        elif available > 0:
+            to_create.append(CartItem(
+                cart=cart,
+                product_id=product_id,
+                quantity=min(quantities[product_id], available),
+            ))
+
+    with transaction.atomic():
+        CartItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+        CartItem.objects.bulk_create(to_create)
+    session_cart.clear()
+    logger.info(f"Session cart merged for {user.username}: {len(to_update)} updated, {len(to_create)} added")
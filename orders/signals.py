@@ -1,12 +1,19 @@
+from django.contrib.auth.signals import user_logged_in
 from django.db.models.signals import post_save, pre_delete
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 from django.utils import timezone
-from .models import Order, OrderItem, Cart
+from .events import record_event
+from .models import Order, Cart
+from .session_cart import merge_session_cart
 import logging
 
 logger = logging.getLogger(__name__)
 import uuid
 
+# Sent by the sweep_carts command after abandoned carts are deleted, with
+# ``carts``: a list of (cart id, user id) pairs of the deleted carts.
+abandoned_carts = Signal()
+
 
 @receiver(post_save, sender=Order)
 def set_order_number(sender, instance, created, **kwargs):
@@ -18,22 +25,24 @@ def set_order_number(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=Order)
-def log_order_status_change(sender, instance, updated_fields=None, **kwargs):
-    if updated_fields and 'status' in updated_fields:
-        logger.info(
-            f"Order {instance.order_number} status changed to: {instance.status}"
-        )
-
-
-@receiver(post_save, sender=OrderItem)
-def log_order_item_creation(sender, instance, created, **kwargs):
+def record_order_status_change(sender, instance, created, update_fields=None, **kwargs):
     if created:
-        logger.info(
-            f"OrderItem added to order {instance.order.order_number}: "
-            f"{instance.product.name} x {instance.quantity}"
-        )
+        instance._loaded_status = instance.status
+        return
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    previous = getattr(instance, '_loaded_status', None)
+    if previous is not None and previous != instance.status:
+        record_event(instance, 'status_changed', status=instance.status, previous=previous)
+    instance._loaded_status = instance.status
 
 
 @receiver(pre_delete, sender=Order)
 def log_order_deletion(sender, instance, **kwargs):
     logger.warning(f"Order deleted: {instance.order_number}")
+
+
+@receiver(user_logged_in)
+def merge_anonymous_cart(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, 'session'):
+        merge_session_cart(request.session, user)
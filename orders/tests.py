@@ -1,3 +1,156 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from products.models import Product
+from .events import HANDLERS, OrderEventDispatcher, record_event
+from .management.commands.sweep_carts import Command as SweepCartsCommand
+from .models import Cart, CartItem, Order, OrderEvent
+from .signals import abandoned_carts
+
+
+class SweepCartsTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Trail Shoe', slug='trail-shoe', price=10, stock=5)
+        self.notified = []
+
+        def receiver(sender, carts, **kwargs):
+            self.notified.extend(carts)
+
+        abandoned_carts.connect(receiver)
+        self.addCleanup(abandoned_carts.disconnect, receiver)
+
+    def make_cart(self, username, days_old):
+        user = User.objects.create_user(username)
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+        touched = timezone.now() - timedelta(days=days_old)
+        Cart.objects.filter(pk=cart.pk).update(updated_at=touched)
+        CartItem.objects.filter(cart=cart).update(updated_at=touched)
+        return cart
+
+    def test_sweeps_only_abandoned_carts(self):
+        old = self.make_cart('old', 40)
+        recent = self.make_cart('recent', 5)
+        call_command('sweep_carts', '--notify', '--skip-sessions', '--sleep', '0', stdout=StringIO())
+        self.assertEqual(list(Cart.objects.values_list('pk', flat=True)), [recent.pk])
+        self.assertFalse(CartItem.objects.filter(cart_id=old.pk).exists())
+        self.assertEqual(self.notified, [(old.pk, old.user_id)])
+
+    def test_cart_touched_after_selection_is_kept(self):
+        old = self.make_cart('old', 40)
+        touched = self.make_cart('touched', 40)
+        command = SweepCartsCommand()
+        command.options = {'notify': True}
+        cutoff = timezone.now() - timedelta(days=30)
+        carts = Cart.objects.filter(updated_at__lt=cutoff)
+        pks = list(carts.values_list('pk', flat=True))
+
+        # A new item lands between the batch selection and the delete.
+        CartItem.objects.filter(cart=touched).update(quantity=2)
+        Cart.objects.filter(pk=touched.pk).update(updated_at=timezone.now())
+
+        command.delete_carts(carts, pks)
+        self.assertEqual(list(Cart.objects.values_list('pk', flat=True)), [touched.pk])
+        self.assertTrue(CartItem.objects.filter(cart=touched).exists())
+        self.assertEqual(self.notified, [(old.pk, old.user_id)])
+
+
+class AddToCartVariantTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer')
+        self.medium = Product.objects.create(name='Samba', slug='samba-m', size='M', price=10, stock=5)
+        self.large = Product.objects.create(name='Samba', slug='samba-l', size='L', price=10, stock=5)
+        self.client.force_login(self.user)
+
+    def add(self, product, **data):
+        return self.client.post(reverse('orders:add_to_cart', args=[product.pk]), data)
+
+    def cart_products(self):
+        return list(CartItem.objects.filter(cart__user=self.user).values_list('product__slug', 'quantity'))
+
+    def test_adds_the_chosen_variant(self):
+        self.add(self.medium, variant_slug='samba-l', quantity=2)
+        self.assertEqual(self.cart_products(), [('samba-l', 2)])
+
+    def test_other_family_is_rejected(self):
+        Product.objects.create(name='Gazelle', slug='gazelle-m', size='M', price=10, stock=5)
+        self.assertEqual(self.add(self.medium, variant_slug='gazelle-m').status_code, 404)
+        self.assertEqual(self.cart_products(), [])
+
+    def test_inactive_variant_is_rejected(self):
+        Product.objects.filter(pk=self.large.pk).update(is_active=False)
+        self.assertEqual(self.add(self.medium, variant_slug='samba-l').status_code, 404)
+        self.assertEqual(self.cart_products(), [])
+
+
+class CheckoutEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('buyer', 'buyer@example.com', 'secret')
+        self.product = Product.objects.create(name='Trail Shoe', slug='trail-shoe', price=10, stock=5)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+        self.client.force_login(self.user)
+
+    def checkout(self, **data):
+        return self.client.post(reverse('orders:checkout'), {
+            'shipping_address': '1 Main St',
+            'shipping_city': 'Kyiv',
+            'postal_code': '01001',
+            'phone_number': '+380000000000',
+            **data,
+        })
+
+    def test_card_payment_records_paid_event(self):
+        self.checkout(payment_method='card', card_number='4242 4242 4242 4242')
+        order = Order.objects.get()
+        self.assertTrue(order.is_paid)
+        self.assertEqual(
+            list(OrderEvent.objects.order_by('pk').values_list('event_type', 'payload__payment_method')),
+            [('created', None), ('paid', 'card')],
+        )
+
+    def test_stock_change_updates_product_etag(self):
+        url = f'/api/v1/products/{self.product.slug}/'
+        etag = self.client.get(url)['ETag']
+        self.checkout(payment_method='cash')
+        OrderEventDispatcher().run()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stock'], 3)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unpaid_checkout_records_only_created(self):
+        self.checkout(payment_method='cash')
+        self.assertFalse(Order.objects.get().is_paid)
+        self.assertEqual(list(OrderEvent.objects.values_list('event_type', flat=True)), ['created'])
+
+
+class OrderEventDispatcherTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('buyer')
+        self.order = Order.objects.create(
+            user=user, total_amount=10, final_amount=10, shipping_address='1 Main St',
+            shipping_city='Kyiv', shipping_postal_code='01001', phone_number='+380000000000',
+        )
+
+    def failing_handler(self, events):
+        raise RuntimeError('handler down')
+
+    @override_settings(ORDER_EVENT_MAX_ATTEMPTS=2)
+    def test_gives_up_after_max_attempts_setting(self):
+        event = record_event(self.order, 'test_failure')
+        HANDLERS['test_failure'].append(self.failing_handler)
+        self.addCleanup(HANDLERS.pop, 'test_failure')
+
+        for _ in range(3):
+            OrderEventDispatcher().run()
+        event.refresh_from_db()
+        self.assertEqual(event.attempts, 2)
+        self.assertIsNone(event.processed_at)
+        self.assertEqual(event.last_error, 'RuntimeError: handler down')
@@ -3,9 +3,14 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView
 from django.contrib import messages
+from django.db import transaction
 from django.http import JsonResponse
 from products.models import Product
+from products import trending
 from .models import Cart, CartItem, Order, OrderItem
+from users.models import get_user_profile
+from .events import record_event, record_order_created
+from .session_cart import SessionCart
 import logging
 from datetime import datetime
 from django.utils import timezone
@@ -13,8 +18,17 @@ from django.utils import timezone
 logger = logging.getLogger(__name__)
 
 
-@login_required(login_url='users:login')
 def cart_view(request):
+    if not request.user.is_authenticated:
+        session_cart = SessionCart(request.session)
+        items = session_cart.get_items()
+        context = {
+            'items': items,
+            'total_price': session_cart.get_total_price(items),
+            'total_items': session_cart.get_total_items(items),
+        }
+        return render(request, 'orders/cart.html', context)
+
     cart, created = Cart.objects.get_or_create(user=request.user)
 
     context = {
@@ -26,14 +40,13 @@ def cart_view(request):
     return render(request, 'orders/cart.html', context)
 
 
-@login_required(login_url='users:login')
 def add_to_cart(request, product_id):
     variant_slug = request.POST.get('variant_slug') or None
     if variant_slug:
-        product = get_object_or_404(Product, slug=variant_slug, is_active=True)
+        # Only a variant of the posted product can be added in its place.
+        product = get_object_or_404(Product.variants_of(pk=product_id), slug=variant_slug)
     else:
         product = get_object_or_404(Product, id=product_id, is_active=True)
-    cart, created = Cart.objects.get_or_create(user=request.user)
 
     quantity = int(request.POST.get('quantity', 1))
 
@@ -41,19 +54,25 @@ def add_to_cart(request, product_id):
         messages.error(request, f"Only {product.stock} items available.")
         return redirect('products:product_detail', slug=product.slug)
 
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        product=product,
-        defaults={'quantity': quantity}
-    )
+    if request.user.is_authenticated:
+        cart, created = Cart.objects.get_or_create(user=request.user)
+        cart_item, created = CartItem.objects.get_or_create(
+            cart=cart,
+            product=product,
+            defaults={'quantity': quantity}
+        )
 
-    if not created:
-        cart_item.quantity += quantity
-        if cart_item.quantity > product.stock:
-            cart_item.quantity = product.stock
-        cart_item.save()
+        if not created:
+            cart_item.quantity += quantity
+            if cart_item.quantity > product.stock:
+                cart_item.quantity = product.stock
+            cart_item.save()
+    else:
+        session_cart = SessionCart(request.session)
+        session_cart.set(product.id, min(session_cart.get_quantity(product.id) + quantity, product.stock))
 
-    logger.info(f"Product added to cart: {product.name} (qty: {quantity}) by {request.user.username}")
+    trending.record(product.pk, 'cart')
+    logger.info(f"Product added to cart: {product.name} (qty: {quantity}) by {request.user.username or 'Anonymous'}")
     messages.success(request, f"{product.name} added to cart!")
 
     if request.POST.get('next'):
@@ -61,8 +80,14 @@ def add_to_cart(request, product_id):
     return redirect('orders:cart')
 
 
-@login_required(login_url='users:login')
 def remove_from_cart(request, item_id):
+    if not request.user.is_authenticated:
+        # Session cart items are addressed by product id.
+        product = get_object_or_404(Product, id=item_id)
+        SessionCart(request.session).remove(product.id)
+        messages.success(request, f"{product.name} removed from cart!")
+        return redirect('orders:cart')
+
     cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
     product_name = cart_item.product.name
     cart_item.delete()
@@ -73,11 +98,24 @@ def remove_from_cart(request, item_id):
     return redirect('orders:cart')
 
 
-@login_required(login_url='users:login')
 def update_cart_item(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
     quantity = int(request.POST.get('quantity', 1))
 
+    if not request.user.is_authenticated:
+        product = get_object_or_404(Product, id=item_id, is_active=True)
+        session_cart = SessionCart(request.session)
+        if quantity <= 0:
+            session_cart.remove(product.id)
+            messages.success(request, f"{product.name} removed from cart!")
+        elif quantity > product.stock:
+            messages.error(request, f"Only {product.stock} items available.")
+        else:
+            session_cart.set(product.id, quantity)
+            messages.success(request, "Cart updated!")
+        return redirect('orders:cart')
+
+    cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
+
     if quantity <= 0:
         cart_item.delete()
         messages.success(request, f"{cart_item.product.name} removed from cart!")
@@ -95,56 +133,70 @@ def update_cart_item(request, item_id):
 @login_required(login_url='users:login')
 def checkout(request):
     cart = get_object_or_404(Cart, user=request.user)
+    cart_items = list(cart.items.select_related('product'))
 
-    if not cart.items.exists():
+    if not cart_items:
         messages.error(request, "Your cart is empty!")
         return redirect('orders:cart')
 
+    total_price = sum((item.product.current_price * item.quantity for item in cart_items), 0)
+
     if request.method == 'POST':
         payment_method = request.POST.get('payment_method', 'card')
-
-        order = Order.objects.create(
-            user=request.user,
-            status='pending',
-            payment_method=payment_method,
-            total_amount=cart.get_total_price(),
-            final_amount=cart.get_total_price(),
-            shipping_address=request.POST.get('shipping_address'),
-            shipping_city=request.POST.get('shipping_city'),
-            shipping_postal_code=request.POST.get('postal_code'),
-            phone_number=request.POST.get('phone_number'),
-            notes=request.POST.get('notes', '')
-        )
+        notes = request.POST.get('notes', '')
+        is_paid = False
 
         if payment_method == 'card' and request.POST.get('card_number'):
             raw = request.POST.get('card_number', '').replace(' ', '')
             last4 = raw[-4:] if len(raw) >= 4 else raw
-            order.is_paid = True
-            extra_note = f"\nPayment: Card ending ****{last4} (mock)."
-            order.notes = (order.notes or '') + extra_note
-            order.save()
-            logger.info(f"Mock card payment applied for order {order.order_number} (****{last4})")
-
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.current_price,
+            is_paid = True
+            notes = (notes or '') + f"\nPayment: Card ending ****{last4} (mock)."
+
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=request.user,
+                status='pending',
+                payment_method=payment_method,
+                is_paid=is_paid,
+                total_amount=total_price,
+                final_amount=total_price,
+                shipping_address=request.POST.get('shipping_address'),
+                shipping_city=request.POST.get('shipping_city'),
+                shipping_postal_code=request.POST.get('postal_code'),
+                phone_number=request.POST.get('phone_number'),
+                notes=notes
             )
 
-        cart.items.all().delete()
-
+            items = []
+            for cart_item in cart_items:
+                price = cart_item.product.current_price
+                items.append(OrderItem(
+                    order=order,
+                    product=cart_item.product,
+                    quantity=cart_item.quantity,
+                    price=price,
+                    subtotal=price * cart_item.quantity,
+                ))
+            OrderItem.objects.bulk_create(items)
+
+            CartItem.objects.filter(cart=cart).delete()
+            record_order_created(order, items)
+            if is_paid:
+                record_event(order, 'paid', payment_method=payment_method)
+
+        if is_paid:
+            logger.info(f"Mock card payment applied for order {order.order_number} (****{last4})")
         logger.info(f"Order created: {order.order_number} by {request.user.username}")
         messages.success(request, "Order placed successfully!")
 
         return redirect('orders:order_detail', order_id=order.id)
 
-    profile = request.user.profile
+    profile = get_user_profile(request.user)
     context = {
         'cart': cart,
+        'cart_items': cart_items,
         'profile': profile,
-        'total_price': cart.get_total_price(),
+        'total_price': total_price,
     }
     return render(request, 'orders/checkout.html', context)
 
@@ -193,7 +245,9 @@ def pay_order(request, order_id):
             extra_note = f"\nPayment: Card ending ****{last4} (mock)."
             order.notes = (order.notes or '') + extra_note
             order.payment_method = payment_method
-            order.save()
+            with transaction.atomic():
+                order.save()
+                record_event(order, 'paid', payment_method=payment_method)
             logger.info(f"Mock card payment applied for order {order.order_number} (****{last4})")
             messages.success(request, "Payment successful!")
             return redirect('orders:order_detail', order_id=order.id)
@@ -222,7 +276,9 @@ def paypal_checkout(request, order_id):
         order.payment_method = 'paypal'
         extra_note = f"\nPayment: PayPal (mock) on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC."
         order.notes = (order.notes or '') + extra_note
-        order.save()
+        with transaction.atomic():
+            order.save()
+            record_event(order, 'paid', payment_method='paypal')
         logger.info(f"Mock PayPal payment applied for order {order.order_number}")
         messages.success(request, "PayPal payment successful!")
         return redirect('orders:order_detail', order_id=order.id)
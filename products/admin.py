@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product, ProductImage
+from .models import Category, Product, ProductFamily, ProductImage
 import logging
 
 logger = logging.getLogger(__name__)
@@ -61,7 +61,7 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     inlines = [ProductImageInline]
     fieldsets = (
-        ('Product Info', {'fields': ('name', 'slug', 'categories')}),
+        ('Product Info', {'fields': ('name', 'slug', 'family', 'categories')}),
         ('Description', {'fields': ('description',)}),
         ('Pricing', {'fields': ('price', 'discount_price')}),
         ('Stock & Availability', {'fields': ('stock', 'is_active')}),
@@ -82,6 +82,13 @@ class ProductAdmin(admin.ModelAdmin):
     get_category.short_description = 'Categories'
 
     filter_horizontal = ('categories',)
+    autocomplete_fields = ('family',)
+
+
+class ProductFamilyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+    readonly_fields = ('created_at',)
 
 class ProductImageAdmin(admin.ModelAdmin):
     list_display = (
@@ -101,4 +108,5 @@ class ProductImageAdmin(admin.ModelAdmin):
 
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Product, ProductAdmin)
+admin.site.register(ProductFamily, ProductFamilyAdmin)
 admin.site.register(ProductImage, ProductImageAdmin)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ProductsConfig(AppConfig):
     name = 'products'
+
+    def ready(self):
+        import products.checks
+        import products.signals
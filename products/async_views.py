@@ -0,0 +1,130 @@
+from asgiref.sync import sync_to_async
+from django.core.paginator import Paginator
+from django.db.models import Avg, F
+from django.http import Http404
+from django.shortcuts import render
+from .models import Product, Category
+from .views import ProductListView, filter_products, get_facet_context
+from . import trending
+from .recently_viewed import RecentlyViewed, view_product
+from reviews.models import Review, ReviewVote
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Data is loaded with the async ORM; templates are still rendered in the
+# sync thread because base.html lazily reads the user's cart and messages.
+arender = sync_to_async(render)
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset]
+
+
+async def home(request):
+    context = {
+        'categories': await _list(Category.objects.filter(is_active=True)),
+        'featured_products': await _list(
+            Product.objects.filter(is_active=True, is_featured=True)[:6]
+        ),
+        'latest_products': await _list(
+            Product.objects.filter(is_active=True).order_by('-created_at')[:8]
+        ),
+        'trending_products': await _list(
+            Product.objects.filter(is_active=True, trending_score__gt=0).order_by('-trending_score')[:8]
+        ),
+        'recently_viewed': await sync_to_async(
+            lambda: RecentlyViewed(request.session).get_products()
+        )(),
+    }
+    return await arender(request, 'home.html', context)
+
+
+async def product_list(request):
+    # A fuzzy search queries the database while the queryset is built.
+    queryset = (await sync_to_async(filter_products)(request.GET)).prefetch_related('images', 'categories')
+
+    paginator = Paginator(queryset, ProductListView.paginate_by)
+    paginator.count = await queryset.acount()
+    page = paginator.get_page(request.GET.get('page'))
+    page.object_list = await _list(page.object_list)
+
+    context = {
+        'products': page.object_list,
+        'page_obj': page,
+        'paginator': paginator,
+        'is_paginated': page.has_other_pages(),
+        'featured_products': await _list(
+            Product.objects.filter(is_active=True, is_featured=True)[:6]
+        ),
+        **await sync_to_async(get_facet_context)(request.GET),
+    }
+    return await arender(request, 'products/product_list.html', context)
+
+
+async def product_detail(request, slug):
+    try:
+        product = await Product.objects.prefetch_related('images', 'categories').aget(slug=slug)
+    except Product.DoesNotExist:
+        raise Http404('No product found matching the query')
+
+    await Product.objects.filter(pk=product.pk).aupdate(views_count=F('views_count') + 1)
+    product.views_count += 1
+    await trending.arecord(product.pk, 'view')
+    # The session store is synchronous.
+    recently_viewed = await sync_to_async(view_product)(request.session, product.pk, limit=4)
+
+    user = await request.auser()
+    reviews_qs = Review.objects.filter(product=product, is_approved=True)
+    avg_rating = (await reviews_qs.aaggregate(avg=Avg('rating')))['avg'] or 0
+    reviews_list = await _list(reviews_qs.select_related('user'))
+
+    vote_map = {}
+    review_form = None
+    if user.is_authenticated:
+        votes_qs = ReviewVote.objects.filter(
+            review__in=reviews_qs, user=user
+        ).values_list('review_id', 'vote')
+        vote_map = {rid: v async for rid, v in votes_qs}
+        if not any(r.user_id == user.id for r in reviews_list):
+            from reviews.forms import ReviewForm
+            review_form = ReviewForm()
+    for r in reviews_list:
+        r.user_vote = vote_map.get(r.id, 0)
+
+    categories = list(product.categories.all())
+    related_products = await _list(
+        Product.objects.filter(
+            categories__in=categories,
+            is_active=True
+        ).exclude(id=product.id)[:5]
+    )
+
+    logger.info(f"Product viewed: {product.name} by {user or 'Anonymous'}")
+
+    context = {
+        'product': product,
+        'object': product,
+        'images': list(product.images.all()),
+        'reviews': reviews_list,
+        'avg_rating': avg_rating,
+        'review_form': review_form,
+        'related_products': related_products,
+        'variants': await _list(product.get_variants()),
+        'recently_viewed': recently_viewed,
+    }
+    return await arender(request, 'products/product_detail.html', context)
+
+
+async def category_products(request, slug):
+    try:
+        category = await Category.objects.aget(slug=slug, is_active=True)
+    except Category.DoesNotExist:
+        raise Http404('No category found matching the query')
+
+    context = {
+        'category': category,
+        'products': await _list(Product.objects.filter(categories=category, is_active=True)),
+        'categories': await _list(Category.objects.filter(is_active=True)),
+    }
+    return await arender(request, 'products/category_products.html', context)
@@ -0,0 +1,41 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def _now_version():
+    return int(time.time() * 1000)
+
+
+def get_catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _now_version(), None)
+        version = cache.get(CATALOG_VERSION_KEY, _now_version())
+    return version
+
+
+async def aget_catalog_version():
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, _now_version(), None)
+        version = await cache.aget(CATALOG_VERSION_KEY, _now_version())
+    return version
+
+
+def bump_catalog_version():
+    # Versions are millisecond timestamps, so a version lost to eviction or a
+    # cache restart can never be reissued and match stale entries.
+    current = cache.get(CATALOG_VERSION_KEY) or 0
+    version = max(current + 1, _now_version())
+    cache.set(CATALOG_VERSION_KEY, version, None)
+    return version
+
+
+def catalog_last_modified(version=None):
+    if version is None:
+        version = get_catalog_version()
+    return datetime.fromtimestamp(version / 1000, tz=timezone.utc)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCMEM_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if settings.CACHES['default']['BACKEND'] != LOCMEM_BACKEND:
+        return []
+    return [Warning(
+        'The default cache is local to each process.',
+        hint=(
+            'The catalog version and the cached pages and API responses keyed '
+            'by it live in the default cache, so with several worker processes '
+            'a catalog write only invalidates the process that made it. Set '
+            'CACHE_BACKEND to a shared backend such as Redis or Memcached.'
+        ),
+        id='products.W001',
+    )]
@@ -0,0 +1,24 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from products.suggest import SuggestIndex
+
+
+class Command(BaseCommand):
+    help = 'Builds the search suggestion index and writes it to SUGGEST_SNAPSHOT_PATH.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None, help='Defaults to SUGGEST_SNAPSHOT_PATH.')
+
+    def handle(self, *args, **options):
+        path = options['output'] or settings.SUGGEST_SNAPSHOT_PATH
+        if not path:
+            raise CommandError('Set SUGGEST_SNAPSHOT_PATH or pass --output.')
+        started = time.perf_counter()
+        index = SuggestIndex.build()
+        index.save(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(index.entries)} entries, {len(index.pairs)} keys written to {path} '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
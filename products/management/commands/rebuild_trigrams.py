@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+from products import trigrams
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the trigram table used by typo-tolerant product search.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        indexed = trigrams.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Trigrams rebuilt for {indexed} products in {time.perf_counter() - started:.2f}s'
+        ))
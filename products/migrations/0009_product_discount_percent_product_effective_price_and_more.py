@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:10
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_product_active_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='discount_percent',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(discount_price__isnull=False, then=django.db.models.functions.comparison.Cast(django.db.models.functions.math.Floor(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('price'), '-', models.F('discount_price')), '*', models.Value(100)), '/', models.F('price'))), models.IntegerField())), default=0), output_field=models.IntegerField()),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce('discount_price', 'price'), output_field=models.DecimalField(decimal_places=2, max_digits=10)),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'effective_price'], name='product_active_eff_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', '-discount_percent'], name='product_active_discount_idx'),
+        ),
+    ]
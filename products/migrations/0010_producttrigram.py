@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-19 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_products(apps, schema_editor):
+    from products.trigrams import product_trigrams
+
+    Product = apps.get_model('products', 'Product')
+    ProductTrigram = apps.get_model('products', 'ProductTrigram')
+    alias = schema_editor.connection.alias
+    batch = []
+    for pk, name, brand in Product.objects.using(alias).values_list('pk', 'name', 'brand').iterator():
+        batch += [ProductTrigram(trigram=trigram, product_id=pk) for trigram in product_trigrams(name, brand)]
+        if len(batch) >= 500:
+            ProductTrigram.objects.using(alias).bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    ProductTrigram.objects.using(alias).bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0009_product_discount_percent_product_effective_price_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Product Trigram',
+                'verbose_name_plural': 'Product Trigrams',
+                'db_table': 'product_trigram',
+                'constraints': [models.UniqueConstraint(fields=('trigram', 'product'), name='product_trigram_unique')],
+            },
+        ),
+        migrations.RunPython(index_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_producttrigram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', '-trending_score'], name='product_active_trending_idx'),
+        ),
+    ]
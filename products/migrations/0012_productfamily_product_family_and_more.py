@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-19 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def group_by_name(apps, schema_editor):
+    # unique_together = ('name', 'size', 'color') made the name the variant
+    # key until now.
+    Product = apps.get_model('products', 'Product')
+    ProductFamily = apps.get_model('products', 'ProductFamily')
+    alias = schema_editor.connection.alias
+    names = Product.objects.using(alias).values_list('name', flat=True).distinct().order_by('name')
+    ProductFamily.objects.using(alias).bulk_create([ProductFamily(name=name) for name in names])
+    for family_id, name in ProductFamily.objects.using(alias).values_list('pk', 'name'):
+        Product.objects.using(alias).filter(name=name).update(family_id=family_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_trending_score_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFamily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Product Family',
+                'verbose_name_plural': 'Product Families',
+                'db_table': 'product_family',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='family',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='variants', to='products.productfamily'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['family', 'is_active', 'size'], name='product_family_variants_idx'),
+        ),
+        migrations.RunPython(group_by_name, migrations.RunPython.noop),
+    ]
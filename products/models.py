@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.db.models import Case, F, Q, Subquery, When
+from django.db.models.functions import Cast, Coalesce, Floor
 from django.utils.text import slugify
 import logging
 
@@ -45,6 +47,24 @@ class Category(models.Model): #232
         super().save(*args, **kwargs)
 
 
+class ProductFamily(models.Model):
+    """Products that are size/color variants of one another."""
+    name = models.CharField(
+        max_length=255,
+        unique=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'product_family'
+        verbose_name = 'Product Family'
+        verbose_name_plural = 'Product Families'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
 class Product(models.Model):
     SIZE_CHOICES = [
         ('XS', 'Extra Small'),
@@ -56,6 +76,15 @@ class Product(models.Model):
     ]
 
     name = models.CharField(max_length=255)
+    family = models.ForeignKey(
+        ProductFamily,
+        on_delete=models.SET_NULL,
+        related_name='variants',
+        blank=True,
+        null=True,
+        # Covered by product_family_variants_idx.
+        db_index=False
+    )
     slug = models.SlugField(unique=True, blank=True, null=True)
     description = models.TextField()
     categories = models.ManyToManyField(
@@ -74,6 +103,25 @@ class Product(models.Model):
         null=True,
         validators=[MinValueValidator(0.01)]
     )
+    # What the customer pays; computed by the database, so it is right after
+    # queryset updates too. ``current_price`` is the in-memory equivalent.
+    effective_price = models.GeneratedField(
+        expression=Coalesce('discount_price', 'price'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
+    discount_percent = models.GeneratedField(
+        expression=Case(
+            When(
+                discount_price__isnull=False,
+                # Floor first: casting rounds on MySQL, int() truncates.
+                then=Cast(Floor((F('price') - F('discount_price')) * 100 / F('price')), models.IntegerField()),
+            ),
+            default=0,
+        ),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
     stock = models.IntegerField(
         default=0,
         validators=[MinValueValidator(0)]
@@ -107,6 +155,8 @@ class Product(models.Model):
     is_featured = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     views_count = models.IntegerField(default=0)
+    # Forward-decayed, see products/trending.py; only compare, never display.
+    trending_score = models.FloatField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -116,6 +166,15 @@ class Product(models.Model):
         verbose_name_plural = 'Products'
         ordering = ['-created_at']
         unique_together = ('name', 'size', 'color')
+        indexes = [
+            models.Index(fields=['is_active', '-created_at'], name='product_active_created_idx'),
+            models.Index(fields=['is_active', 'is_featured', '-created_at'], name='product_featured_idx'),
+            models.Index(fields=['is_active', 'effective_price'], name='product_active_eff_price_idx'),
+            models.Index(fields=['is_active', '-discount_percent'], name='product_active_discount_idx'),
+            models.Index(fields=['is_active', '-views_count'], name='product_active_views_idx'),
+            models.Index(fields=['is_active', '-trending_score'], name='product_active_trending_idx'),
+            models.Index(fields=['family', 'is_active', 'size'], name='product_family_variants_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.size or 'One size'})"
@@ -123,8 +182,28 @@ class Product(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        if self.family_id is None and kwargs.get('update_fields') is None:
+            self.family, created = ProductFamily.objects.get_or_create(name=self.name)
         super().save(*args, **kwargs)
 
+    def get_variants(self):
+        """Active products of this product's family, in size order."""
+        if self.family_id is None:
+            return Product.objects.filter(pk=self.pk, is_active=True)
+        return Product.objects.filter(family_id=self.family_id, is_active=True).order_by('size')
+
+    @classmethod
+    def variants_of(cls, **lookup):
+        """
+        ``get_variants()`` of the product matching ``lookup``, in one query
+        without loading that product first.
+        """
+        family = cls.objects.filter(**lookup).values('family_id')[:1]
+        return cls.objects.filter(
+            Q(family_id=Subquery(family)) | Q(**lookup),
+            is_active=True,
+        ).order_by('size')
+
     @property
     def current_price(self):
         return self.discount_price if self.discount_price else self.price
@@ -168,3 +247,27 @@ class ProductImage(models.Model):
 
     def __str__(self):
         return f"Image for {self.product.name}"
+
+
+class ProductTrigram(models.Model):
+    """
+    Character trigrams of a product's name and brand, for typo-tolerant
+    search on databases without pg_trgm; maintained by ``products.trigrams``.
+    """
+    trigram = models.CharField(max_length=3)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='trigrams'
+    )
+
+    class Meta:
+        db_table = 'product_trigram'
+        verbose_name = 'Product Trigram'
+        verbose_name_plural = 'Product Trigrams'
+        constraints = [
+            models.UniqueConstraint(fields=['trigram', 'product'], name='product_trigram_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.trigram!r} of product {self.product_id}"
@@ -0,0 +1,45 @@
+from django.conf import settings
+from .models import Product
+
+RECENTLY_VIEWED_SESSION_KEY = 'recently_viewed'
+
+
+class RecentlyViewed:
+    """
+    Ids of the products a visitor opened last, newest first, kept in the
+    session and capped at ``RECENTLY_VIEWED_LIMIT``. Sessions survive login,
+    so the list follows the visitor into their account.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.ids = session.get(RECENTLY_VIEWED_SESSION_KEY, [])
+
+    def add(self, product_id):
+        if self.ids[:1] == [product_id]:
+            # Reloading the same page does not dirty the session.
+            return
+        ids = [product_id] + [pk for pk in self.ids if pk != product_id]
+        self.ids = ids[:settings.RECENTLY_VIEWED_LIMIT]
+        self.session[RECENTLY_VIEWED_SESSION_KEY] = self.ids
+
+    def get_products(self, exclude=None, limit=None):
+        """The products in viewing order, with one query."""
+        ids = [pk for pk in self.ids if pk != exclude][:limit]
+        if not ids:
+            return []
+        products = Product.objects.filter(is_active=True).in_bulk(ids)
+        return [products[pk] for pk in ids if pk in products]
+
+
+def view_product(session, product_id, limit=None):
+    """
+    Records a product page view; returns the previously viewed products.
+    Only visitors who already have a session are recorded, so cookieless
+    hits (crawlers, first page loads) do not create a session row each.
+    """
+    recently_viewed = RecentlyViewed(session)
+    products = recently_viewed.get_products(exclude=product_id, limit=limit)
+    if session.session_key:
+        recently_viewed.add(product_id)
+    return products
@@ -0,0 +1,105 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from .models import Category, Product, ProductImage
+from .cache import bump_catalog_version
+from . import facets, suggest, trigrams
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Saves that only touch these fields do not change what the catalog shows.
+UNVERSIONED_FIELDS = frozenset({'views_count'})
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=ProductImage)
+def bump_catalog_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields and UNVERSIONED_FIELDS.issuperset(update_fields):
+        return
+    bump_catalog_version()
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=ProductImage)
+def bump_catalog_on_delete(sender, instance, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def bump_catalog_on_categories_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalog_version()
+
+
+def refresh_facet_index(pks, removed=False):
+    """
+    Runs on commit: the facet index is shared by every request of the
+    process, so it must not show writes a rollback may still undo.
+    """
+    index = facets.get_loaded_index()
+    if index is None:
+        return
+    for pk in pks:
+        if removed:
+            index.remove(pk)
+        else:
+            index.refresh_product(pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def update_facet_index(sender, instance, signal, using, update_fields=None, **kwargs):
+    if facets.get_loaded_index() is None or (update_fields and UNVERSIONED_FIELDS.issuperset(update_fields)):
+        return
+    transaction.on_commit(
+        partial(refresh_facet_index, [instance.pk], removed=signal is post_delete), using=using
+    )
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def update_facet_index_categories(sender, instance, action, reverse, using, pk_set=None, **kwargs):
+    if facets.get_loaded_index() is None or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        transaction.on_commit(partial(refresh_facet_index, [instance.pk]), using=using)
+    elif pk_set:
+        transaction.on_commit(partial(refresh_facet_index, list(pk_set)), using=using)
+    else:
+        transaction.on_commit(facets.invalidate, using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_facet_index(sender, using, **kwargs):
+    transaction.on_commit(facets.invalidate, using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def update_suggest_index(sender, instance, signal, update_fields=None, **kwargs):
+    index = suggest.get_loaded_index()
+    if index is None or (update_fields and UNVERSIONED_FIELDS.issuperset(update_fields)):
+        return
+    if sender is Category:
+        if signal is post_delete:
+            index.put(f'c:{instance.slug}', None)
+        else:
+            index.update_category(instance)
+    elif signal is post_delete:
+        index.remove_product(instance.pk)
+    else:
+        index.update_product(instance)
+
+
+@receiver(post_save, sender=Product)
+def update_product_trigrams(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'name', 'brand'} & set(update_fields):
+        return
+    trigrams.index_product(instance)
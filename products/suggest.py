@@ -0,0 +1,228 @@
+"""
+Prefix suggestions for the search box.
+
+Product names, brands and category names are kept in one sorted list of
+``(key, ref)`` pairs, with a key for every word start, so ``"sho"`` finds
+"Running Shoe". A lookup is a ``bisect`` plus a short scan; nothing touches
+the database. Entries are weighted by views and units sold.
+
+The list is rebuilt from the database (or loaded from the
+``SUGGEST_SNAPSHOT_PATH`` file written by ``manage.py build_suggest_snapshot``)
+on first use, patched by product and category signals, and rebuilt when
+another process changed the catalog, at most once per
+``SUGGEST_INDEX_REFRESH`` seconds.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db.models import Sum
+from .cache import get_catalog_version
+from .models import Category, Product
+import logging
+
+logger = logging.getLogger(__name__)
+
+# One unit sold counts as this many views.
+SALES_WEIGHT = 20
+# Longest run of matching keys looked at for one query.
+MAX_SCAN = 2000
+SNAPSHOT_FORMAT = 2
+
+_lock = threading.Lock()
+_index = None
+
+
+def normalize(text):
+    return ' '.join(str(text).casefold().split())
+
+
+def word_keys(label):
+    """``"Running Shoe"`` -> ``["running shoe", "shoe"]``."""
+    text = normalize(label)
+    keys = [text] if text else []
+    for position, char in enumerate(text):
+        if char == ' ':
+            keys.append(text[position + 1:])
+    return keys
+
+
+class SuggestIndex:
+    def __init__(self, entries, version=None, brands=None):
+        # ref -> (kind, label, slug, weight); refs look like "p:12", "b:nike"
+        self.entries = entries
+        # product ref -> key of its brand entry, so a brand is dropped
+        # once no product carries it any more
+        self.brands = brands or {}
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.pairs = sorted(
+            (key, ref) for ref, entry in entries.items() for key in word_keys(entry[1])
+        )
+
+    @classmethod
+    def build(cls):
+        from orders.models import OrderItem
+
+        version = get_catalog_version()
+        sold = dict(
+            OrderItem.objects.values_list('product_id').annotate(units=Sum('quantity')).order_by()
+        )
+        entries = {}
+        brands = {}
+        product_brands = {}
+        categories = {}
+        rows = Product.objects.filter(is_active=True).values_list('pk', 'name', 'slug', 'brand', 'views_count')
+        for pk, name, slug, brand, views in rows:
+            weight = views + SALES_WEIGHT * sold.get(pk, 0)
+            entries[f'p:{pk}'] = ('product', name, slug, weight)
+            if brand:
+                brands[normalize(brand)] = (brand, brands.get(normalize(brand), (brand, 0))[1] + weight)
+                product_brands[f'p:{pk}'] = normalize(brand)
+        for name, slug, weight in Category.objects.filter(is_active=True).annotate(
+            weight=Sum('products__views_count')
+        ).values_list('name', 'slug', 'weight'):
+            categories[slug] = (name, weight or 0)
+
+        for key, (brand, weight) in brands.items():
+            entries[f'b:{key}'] = ('brand', brand, brand, weight)
+        for slug, (name, weight) in categories.items():
+            entries[f'c:{slug}'] = ('category', name, slug, weight)
+        return cls(entries, version, product_brands)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as snapshot:
+            data = json.load(snapshot)
+        if data.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f'Unsupported suggest snapshot format {data.get("format")!r}')
+        return cls(
+            {ref: tuple(entry) for ref, entry in data['entries'].items()}, data['version'], data['brands']
+        )
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as snapshot:
+            json.dump({
+                'format': SNAPSHOT_FORMAT,
+                'version': self.version,
+                'entries': self.entries,
+                'brands': self.brands,
+            }, snapshot)
+        os.replace(temporary, path)
+
+    def suggest(self, query, limit=8):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        pairs = self.pairs
+        entries = self.entries
+        matches = {}
+        start = bisect_left(pairs, (prefix,))
+        for key, ref in pairs[start:start + MAX_SCAN]:
+            if not key.startswith(prefix):
+                break
+            entry = entries.get(ref)
+            if entry is not None:
+                matches[ref] = entry
+        return heapq.nlargest(limit, matches.values(), key=lambda entry: entry[3])
+
+    def put(self, ref, entry):
+        """Adds, replaces or (with ``entry=None``) removes one entry."""
+        # Readers use self.pairs and self.entries without the lock. Each
+        # insert, delete and slice is one atomic list operation, so a lookup
+        # racing a write at worst misses the entry being written.
+        with self.lock:
+            pairs = self.pairs
+            old = self.entries.get(ref)
+            if old is not None:
+                for key in word_keys(old[1]):
+                    position = bisect_left(pairs, (key, ref))
+                    if position < len(pairs) and pairs[position] == (key, ref):
+                        del pairs[position]
+            if entry is None:
+                self.entries.pop(ref, None)
+            else:
+                self.entries[ref] = entry
+                for key in word_keys(entry[1]):
+                    insort(pairs, (key, ref))
+
+    def update_product(self, product):
+        ref = f'p:{product.pk}'
+        if not product.is_active:
+            self.remove_product(product.pk)
+            return
+        old = self.entries.get(ref)
+        weight = old[3] if old is not None else product.views_count
+        self.put(ref, ('product', product.name, product.slug, weight))
+        self.set_brand(ref, product.brand)
+        if product.brand and f'b:{normalize(product.brand)}' not in self.entries:
+            self.put(f'b:{normalize(product.brand)}', ('brand', product.brand, product.brand, weight))
+
+    def remove_product(self, pk):
+        ref = f'p:{pk}'
+        self.put(ref, None)
+        self.set_brand(ref, None)
+
+    def set_brand(self, ref, brand):
+        key = normalize(brand) if brand else None
+        with self.lock:
+            old = self.brands.pop(ref, None)
+            if key:
+                self.brands[ref] = key
+            stale = old is not None and old != key and old not in self.brands.values()
+        if stale:
+            self.put(f'b:{old}', None)
+
+    def update_category(self, category):
+        ref = f'c:{category.slug}'
+        old = self.entries.get(ref)
+        if not category.is_active:
+            self.put(ref, None)
+        else:
+            self.put(ref, ('category', category.name, category.slug, old[3] if old is not None else 0))
+
+
+def get_suggest_index():
+    global _index
+    index = _index
+    if index is not None and (
+        time.monotonic() - index.loaded_at < settings.SUGGEST_INDEX_REFRESH
+        or index.version == get_catalog_version()
+    ):
+        return index
+    with _lock:
+        if _index is index:
+            _index = _load_or_build(first=index is None)
+        return _index
+
+
+def _load_or_build(first):
+    path = settings.SUGGEST_SNAPSHOT_PATH
+    if first and path and os.path.exists(path):
+        try:
+            index = SuggestIndex.load(path)
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning(f"Could not load suggest snapshot {path}: {exc}")
+        else:
+            logger.info(f"Suggest index loaded from {path}: {len(index.entries)} entries")
+            return index
+    started = time.perf_counter()
+    index = SuggestIndex.build()
+    logger.info(
+        f"Suggest index built: {len(index.entries)} entries in "
+        f"{(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return index
+
+
+def get_loaded_index():
+    return _index
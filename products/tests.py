@@ -1,3 +1,313 @@
-from django.test import TestCase
+import os
+import tempfile
+from decimal import Decimal
+from importlib import import_module
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.checks import run_checks
+from django.db import connection, transaction
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from . import async_views, facets
+from .models import Category, Product, ProductFamily
+from .recently_viewed import RECENTLY_VIEWED_SESSION_KEY
+from .suggest import SuggestIndex
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+SHARED_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+
+
+class SharedCacheCheckTests(TestCase):
+    def check_ids(self):
+        return [message.id for message in run_checks(include_deployment_checks=True)]
+
+    def test_locmem_cache_warns_on_deploy(self):
+        with override_settings(CACHES=LOCMEM_CACHES):
+            self.assertIn('products.W001', self.check_ids())
+
+    def test_shared_cache_passes(self):
+        with override_settings(CACHES=SHARED_CACHES):
+            self.assertNotIn('products.W001', self.check_ids())
+
+
+class DiscountPercentTests(TestCase):
+    def test_generated_column_truncates_like_discount_percentage(self):
+        for price, discount_price in [('3.00', '1.00'), ('9.99', '3.33'), ('100.00', '0.50'), ('10.00', None)]:
+            with self.subTest(price=price, discount_price=discount_price):
+                product = Product.objects.create(
+                    name=f'Shoe {price} {discount_price}',
+                    slug=f'shoe-{price}-{discount_price}'.replace('.', '-'),
+                    price=Decimal(price),
+                    discount_price=discount_price and Decimal(discount_price),
+                )
+                product.refresh_from_db()
+                self.assertEqual(product.discount_percent, product.discount_percentage)
+
+    def test_non_integer_percentage_is_truncated(self):
+        product = Product.objects.create(name='Cap', slug='cap', price=3, discount_price=1)
+        self.assertEqual(Product.objects.values_list('discount_percent', flat=True).get(pk=product.pk), 66)
+
+
+class FuzzySearchPageTests(TestCase):
+    def setUp(self):
+        for name, brand in [('Samba', 'Adidas'), ('Gazelle', 'Adidas'), ('Adida Shoe', ''), ('Air Max', 'Nike')]:
+            Product.objects.create(name=name, slug=name.lower().replace(' ', '-'), brand=brand, price=10)
+
+    def names(self, context):
+        return [product.name for product in context['products']]
+
+    def test_typo_search(self):
+        response = self.client.get('/products/?search=adiddas')
+        self.assertEqual(self.names(response.context), ['Samba', 'Gazelle', 'Adida Shoe'])
+
+    async def test_typo_search_async(self):
+        request = AsyncRequestFactory().get('/products/?search=adiddas')
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        with self.assertTemplateUsed('products/product_list.html') as template:
+            response = await async_views.product_list(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(template.context), ['Samba', 'Gazelle', 'Adida Shoe'])
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+class RecentlyViewedTests(TestCase):
+    def setUp(self):
+        self.first = Product.objects.create(name='Samba', slug='samba', price=10)
+        self.second = Product.objects.create(name='Gazelle', slug='gazelle', price=10)
+
+    def test_cookieless_view_creates_no_session(self):
+        response = self.client.get(f'/products/product/{self.first.slug}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Session.objects.exists())
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_existing_session_records_views(self):
+        session = self.client.session
+        session['started'] = True
+        session.save()
+        self.client.cookies['sessionid'] = session.session_key
+
+        self.client.get(f'/products/product/{self.first.slug}/')
+        response = self.client.get(f'/products/product/{self.second.slug}/')
+        self.assertEqual(response.context['recently_viewed'], [self.first])
+        self.assertEqual(self.client.session[RECENTLY_VIEWED_SESSION_KEY], [self.second.pk, self.first.pk])
+        self.assertEqual(Session.objects.count(), 1)
+
+
+class ProductFamilyTests(TestCase):
+    def make_variant(self, size, **fields):
+        fields.setdefault('name', 'Samba')
+        return Product.objects.create(slug=f"{fields['name'].lower()}-{size.lower()}", size=size, price=10, **fields)
+
+    def test_save_groups_variants_by_name(self):
+        large, medium = self.make_variant('L'), self.make_variant('M')
+        other = self.make_variant('M', name='Gazelle')
+        self.assertIsNotNone(large.family_id)
+        self.assertEqual(medium.family_id, large.family_id)
+        self.assertNotEqual(other.family_id, large.family_id)
+        self.assertEqual(list(ProductFamily.objects.values_list('name', flat=True)), ['Gazelle', 'Samba'])
+
+    def test_save_keeps_an_explicit_family(self):
+        family = ProductFamily.objects.create(name='Originals')
+        product = self.make_variant('M', family=family)
+        self.assertEqual(product.family, family)
+        self.assertFalse(ProductFamily.objects.filter(name='Samba').exists())
+
+    def test_update_fields_save_does_not_create_a_family(self):
+        product = self.make_variant('M')
+        Product.objects.filter(pk=product.pk).update(family=None)
+        product.refresh_from_db()
+        product.increment_views()
+        product.refresh_from_db()
+        self.assertIsNone(product.family_id)
+
+    def test_variants(self):
+        large, small, medium = self.make_variant('L'), self.make_variant('S'), self.make_variant('M')
+        self.make_variant('XL', is_active=False)
+        self.make_variant('M', name='Gazelle')
+        self.assertEqual(list(small.get_variants()), [large, medium, small])
+        with self.assertNumQueries(1):
+            self.assertEqual(list(Product.variants_of(slug='samba-s')), [large, medium, small])
+
+    def test_variants_without_a_family(self):
+        product = self.make_variant('M')
+        Product.objects.filter(pk=product.pk).update(family=None)
+        product.refresh_from_db()
+        self.assertEqual(list(product.get_variants()), [product])
+        self.assertEqual(list(Product.variants_of(slug='samba-m')), [product])
+        self.assertEqual(list(Product.variants_of(slug='missing')), [])
+
+
+class GroupByNameMigrationTests(TestCase):
+    def test_groups_existing_products_by_name(self):
+        migration = import_module('products.migrations.0012_productfamily_product_family_and_more')
+        for name, size in [('Samba', 'M'), ('Samba', 'L'), ('Gazelle', 'M')]:
+            Product.objects.create(name=name, slug=f'{name.lower()}-{size.lower()}', size=size, price=10)
+        Product.objects.update(family=None)
+        ProductFamily.objects.all().delete()
+
+        migration.group_by_name(apps, SimpleNamespace(connection=connection))
+
+        families = dict(ProductFamily.objects.values_list('name', 'pk'))
+        self.assertEqual(sorted(families), ['Gazelle', 'Samba'])
+        self.assertEqual(
+            list(Product.objects.order_by('pk').values_list('family_id', flat=True)),
+            [families['Samba'], families['Samba'], families['Gazelle']],
+        )
+
+
+class FacetIndexTests(TestCase):
+    def setUp(self):
+        facets.invalidate()
+        self.addCleanup(facets.invalidate)
+        shoes = Category.objects.create(name='Shoes', slug='shoes')
+        self.samba = Product.objects.create(name='Samba', slug='samba', brand='Adidas', size='M', price=60)
+        self.gazelle = Product.objects.create(
+            name='Gazelle', slug='gazelle', brand='Adidas', size='L', price=120, discount_price=Decimal('45.00')
+        )
+        self.pegasus = Product.objects.create(name='Pegasus', slug='pegasus', brand='Nike', size='M', price=250)
+        Product.objects.create(name='Old Max', slug='old-max', brand='Nike', price=10, is_active=False)
+        self.samba.categories.add(shoes)
+        self.pegasus.categories.add(shoes)
+
+    def counts(self, facet, selected=None, index=None):
+        result = (index or facets.FacetIndex.build()).counts(selected or {})
+        return {item['value']: item['count'] for item in result['facets'][facet]}
+
+    def test_counts(self):
+        index = facets.FacetIndex.build()
+        result = index.counts({})
+        self.assertEqual(result['total'], 3)
+        self.assertEqual(self.counts('brand', index=index), {'Adidas': 2, 'Nike': 1})
+        self.assertEqual(self.counts('category', index=index), {'shoes': 2})
+        self.assertEqual(result['facets']['category'][0]['label'], 'Shoes')
+        # Discounts count by the effective price.
+        self.assertEqual(self.counts('price', index=index), {'25-50': 1, '50-100': 1, '200+': 1})
+
+    def test_facet_ignores_its_own_filter(self):
+        index = facets.FacetIndex.build()
+        result = index.counts({'brand': ['Nike']})
+        self.assertEqual(result['total'], 1)
+        self.assertEqual(self.counts('brand', {'brand': ['Nike']}, index), {'Adidas': 2, 'Nike': 1})
+        self.assertEqual(self.counts('size', {'brand': ['Nike']}, index), {'M': 1})
+        self.assertEqual(self.counts('brand', {'size': ['M']}, index), {'Adidas': 1, 'Nike': 1})
+        selected = {'brand': ['Adidas'], 'price': ['200+']}
+        self.assertEqual(index.counts(selected)['total'], 0)
+        self.assertEqual(self.counts('price', selected, index), {'25-50': 1, '50-100': 1, '200+': 0})
+
+    def test_refresh_product_and_remove(self):
+        index = facets.FacetIndex.build()
+        Product.objects.filter(pk=self.samba.pk).update(brand='Nike', price=20)
+        index.refresh_product(self.samba.pk)
+        self.assertEqual(self.counts('brand', index=index), {'Adidas': 1, 'Nike': 2})
+        self.assertEqual(self.counts('price', index=index), {'0-25': 1, '25-50': 1, '200+': 1})
+
+        Product.objects.filter(pk=self.samba.pk).update(is_active=False)
+        index.refresh_product(self.samba.pk)
+        self.assertEqual(index.counts({})['total'], 2)
+        self.assertEqual(self.counts('category', index=index), {'shoes': 1})
+
+        index.remove(self.pegasus.pk)
+        self.assertEqual(self.counts('brand', index=index), {'Adidas': 1})
+        self.assertEqual(self.counts('size', index=index), {'L': 1})
+        self.assertEqual(self.counts('category', index=index), {})
+
+    def test_signals_update_the_index_on_commit(self):
+        index = facets.get_facet_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.samba.brand = 'Puma'
+            self.samba.save()
+            self.assertEqual(self.counts('brand', index=index), {'Adidas': 2, 'Nike': 1})
+        self.assertEqual(self.counts('brand', index=index), {'Adidas': 1, 'Nike': 1, 'Puma': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pegasus.delete()
+        self.assertEqual(self.counts('brand', index=index), {'Adidas': 1, 'Puma': 1})
+
+    def test_rolled_back_save_leaves_the_index_alone(self):
+        index = facets.get_facet_index()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.samba.brand = 'Puma'
+                    self.samba.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertIs(facets.get_loaded_index(), index)
+        self.assertEqual(self.counts('brand', index=index), {'Adidas': 2, 'Nike': 1})
+
+
+class SuggestIndexTests(TestCase):
+    def setUp(self):
+        self.index = SuggestIndex({
+            'p:1': ('product', 'Running Shoe', 'running-shoe', 5),
+            'p:2': ('product', 'Trail Runner', 'trail-runner', 50),
+            'p:3': ('product', 'Rain Jacket', 'rain-jacket', 1),
+            'b:runa': ('brand', 'Runa', 'Runa', 10),
+            'c:running': ('category', 'Running', 'running', 20),
+        }, brands={'p:1': 'runa'})
+
+    def labels(self, query, limit=8):
+        return [label for kind, label, slug, weight in self.index.suggest(query, limit)]
+
+    def test_prefix_matches_every_word_start_by_weight(self):
+        self.assertEqual(self.labels('run'), ['Trail Runner', 'Running', 'Runa', 'Running Shoe'])
+        self.assertEqual(self.labels('  RUNNING  '), ['Running', 'Running Shoe'])
+        self.assertEqual(self.labels('sho'), ['Running Shoe'])
+        self.assertEqual(self.labels('run', limit=2), ['Trail Runner', 'Running'])
+        self.assertEqual(self.labels('x'), [])
+        self.assertEqual(self.labels(''), [])
+
+    def test_put_keeps_the_pairs_sorted_in_place(self):
+        pairs = self.index.pairs
+        self.index.put('p:4', ('product', 'Road Shoe', 'road-shoe', 3))
+        self.index.put('p:3', None)
+        self.assertIs(self.index.pairs, pairs)
+        self.assertEqual(pairs, sorted(pairs))
+        self.assertEqual(self.labels('r'), ['Trail Runner', 'Running', 'Runa', 'Running Shoe', 'Road Shoe'])
+
+    def product(self, **fields):
+        fields = {'pk': 1, 'name': 'Running Shoe', 'slug': 'running-shoe', 'brand': 'Runa', 'is_active': True,
+                  'views_count': 0, **fields}
+        return Product(**fields)
+
+    def test_rename(self):
+        self.index.update_product(self.product(name='Road Shoe', slug='road-shoe'))
+        self.assertEqual(self.labels('running'), ['Running'])
+        self.assertEqual(self.index.suggest('road'), [('product', 'Road Shoe', 'road-shoe', 5)])
+        self.assertEqual(len(self.index.pairs), 8)
+
+    def test_brand_change_drops_the_old_brand(self):
+        self.index.update_product(self.product(brand='Nike'))
+        self.assertEqual(self.labels('runa'), [])
+        self.assertEqual(self.labels('nike'), ['Nike'])
+        self.assertEqual(self.index.brands, {'p:1': 'nike'})
+
+    def test_brand_still_in_use_is_kept(self):
+        self.index.update_product(self.product(pk=3, name='Rain Jacket', slug='rain-jacket', brand='RUNA'))
+        self.index.update_product(self.product(brand=''))
+        self.assertEqual(self.labels('runa'), ['Runa'])
+        self.index.update_product(self.product(pk=3, name='Rain Jacket', slug='rain-jacket', is_active=False))
+        self.assertEqual(self.labels('runa'), [])
+        self.assertEqual(self.labels('rain'), [])
+
+    def test_build_and_snapshot(self):
+        Product.objects.create(name='Samba', slug='samba', brand='Adidas', price=10, views_count=3)
+        Product.objects.create(name='Gazelle', slug='gazelle', brand='adidas', price=10)
+        index = SuggestIndex.build()
+        self.assertEqual(sorted(index.brands.values()), ['adidas', 'adidas'])
+        self.assertEqual(index.suggest('adi'), [('brand', 'Adidas', 'Adidas', 3)])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'suggest.json')
+            index.save(path)
+            loaded = SuggestIndex.load(path)
+        self.assertEqual((loaded.entries, loaded.brands, loaded.pairs), (index.entries, index.brands, index.pairs))
@@ -0,0 +1,110 @@
+"""
+Trending score: recent views, add-to-carts and ordered units with
+exponential time decay.
+
+Scores use forward decay: an event at time ``t`` adds
+``weight * 2 ** ((t - TRENDING_EPOCH) / half-life)`` to
+``Product.trending_score``. Later events weigh more, so the stored scores
+rank products exactly like decayed scores would, without ever rewriting
+old rows, and ``?sort=trending`` is an indexed ``ORDER BY``.
+
+Views and add-to-carts are summed in a per-process buffer and written with
+one ``UPDATE`` every ``TRENDING_FLUSH_SECONDS``; a buffer lost with its
+process only loses a few seconds of signal. Ordered units come from the
+order event dispatcher.
+"""
+import atexit
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+from .models import Product
+import logging
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS = {
+    'view': 1.0,
+    'cart': 3.0,
+    'order': 10.0,
+}
+# A buffer this large is flushed before its interval is up.
+MAX_BUFFERED = 500
+
+_lock = threading.Lock()
+_buffer = {}
+_flushed_at = time.monotonic()
+
+
+def get_epoch():
+    epoch = datetime.fromisoformat(settings.TRENDING_EPOCH)
+    return epoch if epoch.tzinfo else epoch.replace(tzinfo=dt_timezone.utc)
+
+
+def decay_factor(at=None):
+    """How much an event at ``at`` (default now) outweighs one at the epoch."""
+    age = ((at or timezone.now()) - get_epoch()).total_seconds()
+    return 2.0 ** (age / (settings.TRENDING_HALF_LIFE_HOURS * 3600))
+
+
+def current_score(stored, at=None):
+    """A stored score in points as of ``at``, for display."""
+    return stored / decay_factor(at)
+
+
+def add_points(points):
+    """Adds ``{product_id: points}`` to the stored scores in one query."""
+    if not points:
+        return
+    # Queryset updates skip the catalog signals: ranking changes alone do
+    # not invalidate cached pages, so the API serves ?ordering=-trending_score
+    # uncached.
+    Product.objects.filter(pk__in=points).update(
+        trending_score=F('trending_score') + Case(
+            *[When(pk=product_id, then=Value(value)) for product_id, value in points.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+def _buffer_event(product_id, kind, amount):
+    points = WEIGHTS[kind] * amount * decay_factor()
+    with _lock:
+        _buffer[product_id] = _buffer.get(product_id, 0.0) + points
+        return (
+            len(_buffer) >= MAX_BUFFERED
+            or time.monotonic() - _flushed_at >= settings.TRENDING_FLUSH_SECONDS
+        )
+
+
+def record(product_id, kind, amount=1):
+    if _buffer_event(product_id, kind, amount):
+        flush()
+
+
+async def arecord(product_id, kind, amount=1):
+    if _buffer_event(product_id, kind, amount):
+        await sync_to_async(flush)()
+
+
+def flush():
+    global _buffer, _flushed_at
+    with _lock:
+        points, _buffer = _buffer, {}
+        _flushed_at = time.monotonic()
+    try:
+        add_points(points)
+    except DatabaseError as exc:
+        logger.warning(f"Trending flush of {len(points)} products failed: {exc}")
+        with _lock:
+            for product_id, value in points.items():
+                _buffer[product_id] = _buffer.get(product_id, 0.0) + value
+
+
+atexit.register(flush)
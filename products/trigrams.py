@@ -0,0 +1,113 @@
+"""
+Typo-tolerant product search.
+
+Product names and brands are split into character trigrams, pg_trgm style
+(``"shoe"`` -> ``"  s", " sh", "sho", "hoe", "oe "``), and stored in the
+``ProductTrigram`` side table, so it works on MySQL as well. A query is
+scored per product by the share of its trigrams the product has, which one
+indexed ``GROUP BY`` returns; ``"adiddas"`` still finds Adidas.
+
+Fuzzy matches are only mixed in when the exact search finds fewer than
+``SEARCH_FUZZY_MIN_RESULTS`` products.
+"""
+import re
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Value, When
+from .models import Product, ProductTrigram
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Most fuzzy candidates added to one search.
+MAX_CANDIDATES = 50
+# Alias of the similarity rank on querysets ordered by ``fuzzy_search``.
+SEARCH_RANK = 'search_rank'
+WORD_RE = re.compile(r'\w+')
+
+
+def trigrams(text):
+    found = set()
+    for word in WORD_RE.findall(str(text).casefold()):
+        padded = f'  {word} '
+        found.update(padded[position:position + 3] for position in range(len(padded) - 2))
+    return found
+
+
+def product_trigrams(name, brand):
+    return trigrams(f'{name} {brand or ""}')
+
+
+def index_product(product):
+    """
+    Replaces the stored trigrams of one product. Conflicts are ignored:
+    accent-insensitive MySQL collations treat "afé" and "afe" as equal.
+    """
+    with transaction.atomic():
+        ProductTrigram.objects.filter(product_id=product.pk).delete()
+        ProductTrigram.objects.bulk_create(
+            [
+                ProductTrigram(trigram=trigram, product_id=product.pk)
+                for trigram in product_trigrams(product.name, product.brand)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def rebuild(batch_size=500):
+    """Rebuilds the whole table; returns the number of products indexed."""
+    rows = Product.objects.values_list('pk', 'name', 'brand').order_by('pk')
+    indexed = 0
+    with transaction.atomic():
+        ProductTrigram.objects.all().delete()
+        batch = []
+        for pk, name, brand in rows.iterator(chunk_size=batch_size):
+            batch += [ProductTrigram(trigram=trigram, product_id=pk) for trigram in product_trigrams(name, brand)]
+            indexed += 1
+            if len(batch) >= batch_size:
+                ProductTrigram.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        ProductTrigram.objects.bulk_create(batch, ignore_conflicts=True)
+    return indexed
+
+
+def fuzzy_matches(query, limit=MAX_CANDIDATES):
+    """Returns ``[(product_id, similarity)]``, best first."""
+    wanted = trigrams(query)
+    if not wanted:
+        return []
+    threshold = settings.SEARCH_FUZZY_THRESHOLD
+    rows = (
+        ProductTrigram.objects.filter(trigram__in=wanted)
+        .values_list('product_id')
+        .annotate(shared=Count('pk'))
+        .filter(shared__gte=max(1, round(threshold * len(wanted))))
+        .order_by('-shared', 'product_id')[:limit]
+    )
+    return [(product_id, shared / len(wanted)) for product_id, shared in rows]
+
+
+def fuzzy_search(queryset, exact, query):
+    """
+    ``exact`` (``queryset`` filtered by the plain search) when it finds
+    enough products; otherwise ``queryset`` narrowed to the exact matches
+    plus fuzzy ones, ordered exact matches first, then by similarity.
+
+    Deciding between the two runs queries right away, so async views call
+    it through ``sync_to_async``.
+    """
+    wanted = settings.SEARCH_FUZZY_MIN_RESULTS
+    if not wanted or len(exact.values_list('pk', flat=True).order_by()[:wanted]) >= wanted:
+        return exact
+    matches = fuzzy_matches(query)
+    if not matches:
+        return exact
+    ids = [product_id for product_id, similarity in matches]
+    rank = Case(
+        *[When(pk=product_id, then=Value(position)) for position, product_id in enumerate(ids, 1)],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return (exact | queryset.filter(pk__in=ids)).alias(**{SEARCH_RANK: rank}).order_by(SEARCH_RANK, *ordering)
@@ -1,10 +1,20 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'products'
 
-urlpatterns = [
-    path('', views.ProductListView.as_view(), name='product_list'),
-    path('product/<slug:slug>/', views.ProductDetailView.as_view(), name='product_detail'),
-    path('category/<slug:slug>/', views.category_products, name='category'),
-]
+if settings.ASYNC_CATALOG_VIEWS:
+    from . import async_views
+
+    urlpatterns = [
+        path('', async_views.product_list, name='product_list'),
+        path('product/<slug:slug>/', async_views.product_detail, name='product_detail'),
+        path('category/<slug:slug>/', async_views.category_products, name='category'),
+    ]
+else:
+    urlpatterns = [
+        path('', views.ProductListView.as_view(), name='product_list'),
+        path('product/<slug:slug>/', views.ProductDetailView.as_view(), name='product_detail'),
+        path('category/<slug:slug>/', views.category_products, name='category'),
+    ]
@@ -1,13 +1,95 @@
+from decimal import Decimal
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView
 from django.db.models import Q, Avg
+from .facets import apply_facet_filters, facet_counts, parse_facet_filters
 from .models import Product, Category, ProductImage
+from .trigrams import fuzzy_search
+from . import trending
+from .recently_viewed import RecentlyViewed, view_product
 from reviews.models import Review
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+# ?sort= value -> ordering; prices sort by what the customer pays.
+SORT_OPTIONS = {
+    'price': 'effective_price',
+    '-price': '-effective_price',
+    'name': 'name',
+    '-name': '-name',
+    'views_count': 'views_count',
+    '-views_count': '-views_count',
+    'discount': '-discount_percent',
+    'trending': '-trending_score',
+}
+
+
+def parse_price(value):
+    try:
+        price = Decimal(value)
+    except (TypeError, ValueError, ArithmeticError):
+        return None
+    return price if price.is_finite() and price >= 0 else None
+
+
+FACET_TITLES = {
+    'brand': 'Brand',
+    'size': 'Size',
+    'color': 'Color',
+    'material': 'Material',
+    'price': 'Price range',
+}
+
+
+def filter_products(params, facets=True):
+    queryset = Product.objects.filter(is_active=True)
+
+    search = params.get('search')
+    if search:
+        queryset = fuzzy_search(queryset, queryset.filter(
+            Q(name__icontains=search) |
+            Q(description__icontains=search) |
+            Q(brand__icontains=search)
+        ), search)
+
+    min_price = parse_price(params.get('min_price'))
+    if min_price is not None:
+        queryset = queryset.filter(effective_price__gte=min_price)
+    max_price = parse_price(params.get('max_price'))
+    if max_price is not None:
+        queryset = queryset.filter(effective_price__lte=max_price)
+
+    if facets:
+        queryset = apply_facet_filters(queryset, parse_facet_filters(params))
+
+    sort = params.get('sort', '-created_at')
+    if sort in SORT_OPTIONS:
+        queryset = queryset.order_by(SORT_OPTIONS[sort])
+
+    return queryset
+
+
+def get_facet_context(params):
+    # Facet filters are counted from the in-memory index; only the other
+    # filters need a query, and only when they are used.
+    base = None
+    if any(params.get(name) for name in ('search', 'min_price', 'max_price')):
+        base = filter_products(params, facets=False)
+    counts = facet_counts(parse_facet_filters(params), base)
+    return {
+        'facet_total': counts['total'],
+        'category_facet': counts['facets']['category'],
+        'facet_groups': [
+            (facet, title, counts['facets'][facet])
+            for facet, title in FACET_TITLES.items()
+            if counts['facets'][facet]
+        ],
+    }
+
+
 class ProductListView(ListView):
     model = Product
     template_name = 'products/product_list.html'
@@ -15,33 +97,15 @@ class ProductListView(ListView):
     paginate_by = 12
 
     def get_queryset(self):
-        queryset = Product.objects.filter(is_active=True)
-
-        search = self.request.GET.get('search')
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(brand__icontains=search)
-            )
-
-        category = self.request.GET.get('category')
-        if category:
-            queryset = queryset.filter(categories__slug=category)
-
-        sort = self.request.GET.get('sort', '-created_at')
-        if sort in ['price', '-price', 'name', '-name', 'views_count', '-views_count']:
-            queryset = queryset.order_by(sort)
-
-        return queryset
+        return filter_products(self.request.GET)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.filter(is_active=True)
         context['featured_products'] = Product.objects.filter(
             is_active=True,
             is_featured=True
         )[:6]
+        context.update(get_facet_context(self.request.GET))
         return context
 
 
@@ -57,6 +121,8 @@ class ProductDetailView(DetailView):
         product = self.get_object()
 
         product.increment_views()
+        trending.record(product.pk, 'view')
+        context['recently_viewed'] = view_product(self.request.session, product.pk, limit=4)
 
         context['images'] = product.images.all()
 
@@ -93,26 +159,14 @@ class ProductDetailView(DetailView):
 
         logger.info(f"Product viewed: {product.name} by {self.request.user or 'Anonymous'}")
 
-        first_category = product.categories.first()
-        if first_category:
-            variants_qs = Product.objects.filter(
-                name=product.name,
-                categories=first_category,
-                is_active=True
-            ).order_by('size')
-        else:
-            variants_qs = Product.objects.filter(
-                name=product.name,
-                is_active=True
-            ).order_by('size')
-        context['variants'] = variants_qs
+        context['variants'] = product.get_variants()
 
         return context
 
 
 def category_products(request, slug):
     category = get_object_or_404(Category, slug=slug, is_active=True)
-    products = Product.objects.filter(category=category, is_active=True)
+    products = Product.objects.filter(categories=category, is_active=True)
 
     context = {
         'category': category,
@@ -126,10 +180,13 @@ def home(request):
     categories = Category.objects.filter(is_active=True)
     featured_products = Product.objects.filter(is_active=True, is_featured=True)[:6]
     latest_products = Product.objects.filter(is_active=True).order_by('-created_at')[:8]
+    trending_products = Product.objects.filter(is_active=True, trending_score__gt=0).order_by('-trending_score')[:8]
 
     context = {
         'categories': categories,
         'featured_products': featured_products,
         'latest_products': latest_products,
+        'trending_products': trending_products,
+        'recently_viewed': RecentlyViewed(request.session).get_products(),
     }
     return render(request, 'home.html', context)
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from .models import Review
 import logging
@@ -47,12 +48,12 @@ class ReviewAdmin(admin.ModelAdmin):
     rating_display.short_description = 'Rating'
 
     def approve_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        updated = queryset.update(is_approved=True, updated_at=timezone.now())
         self.message_user(request, f'{updated} review(s) approved.')
     approve_reviews.short_description = 'Approve selected reviews'
 
     def disapprove_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=False)
+        updated = queryset.update(is_approved=False, updated_at=timezone.now())
         self.message_user(request, f'{updated} review(s) disapproved.')
     disapprove_reviews.short_description = 'Disapprove selected reviews'
 
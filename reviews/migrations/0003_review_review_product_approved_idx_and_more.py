@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_product_product_active_created_idx_and_more'),
+        ('reviews', '0002_reviewvote'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'is_approved', '-created_at'], name='review_product_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['is_approved', '-created_at'], name='review_approved_created_idx'),
+        ),
+    ]
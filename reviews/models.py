@@ -51,6 +51,10 @@ class Review(models.Model):
         verbose_name_plural = 'Reviews'
         ordering = ['-created_at']
         unique_together = ('product', 'user')
+        indexes = [
+            models.Index(fields=['product', 'is_approved', '-created_at'], name='review_product_approved_idx'),
+            models.Index(fields=['is_approved', '-created_at'], name='review_approved_created_idx'),
+        ]
 
     def __str__(self):
         return f"Review by {self.user.username} for {self.product.name}"
@@ -0,0 +1,144 @@
+"""
+Read replicas for catalog and review reads.
+
+``ReplicaRouter`` sends reads of the ``products`` and ``reviews`` models to
+the aliases in ``DATABASE_REPLICAS`` and everything else to ``default``.
+Reads go to the primary instead when:
+
+- the request is pinned by ``replica_pin_middleware``: it writes, or the
+  client wrote within the last ``DB_REPLICA_PIN_SECONDS`` (read-your-writes);
+- code runs inside :func:`use_primary` or a transaction on ``default``;
+- no replica answered its last health check. A failed replica is retried
+  after ``DB_REPLICA_RETRY_SECONDS``.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.decorators import sync_and_async_middleware
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPLICATED_APPS = frozenset({'products', 'reviews'})
+PIN_COOKIE = 'db_pin'
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+# Seconds between checks of a replica that was up.
+CHECK_INTERVAL = 10
+
+_pinned = ContextVar('db_pinned', default=False)
+_lock = threading.Lock()
+# alias -> (monotonic time of the last check, available)
+_health = {}
+
+
+@contextmanager
+def use_primary():
+    """Sends every read in the block to the primary."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def _check(alias):
+    connection = connections[alias]
+    try:
+        connection.ensure_connection()
+        if connection.is_usable():
+            return True
+    except DatabaseError as exc:
+        logger.warning(f"Replica {alias} unavailable: {exc}")
+    try:
+        connection.close()
+    except DatabaseError:
+        pass
+    return False
+
+
+def is_available(alias):
+    now = time.monotonic()
+    checked = _health.get(alias)
+    if checked is not None:
+        checked_at, available = checked
+        interval = CHECK_INTERVAL if available else settings.DB_REPLICA_RETRY_SECONDS
+        if now - checked_at < interval:
+            return available
+
+    available = _check(alias)
+    with _lock:
+        previous = _health.get(alias)
+        _health[alias] = (now, available)
+    if previous is not None and previous[1] != available:
+        if available:
+            logger.info(f"Replica {alias} is back")
+        else:
+            logger.error(f"Replica {alias} is down, reading from the primary")
+    return available
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label not in REPLICATED_APPS:
+            return DEFAULT_DB_ALIAS
+        if _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        candidates = [alias for alias in replicas if is_available(alias)]
+        if not candidates:
+            return DEFAULT_DB_ALIAS
+        return random.choice(candidates)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _pin_request(request):
+    pinned = request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+    return _pinned.set(pinned)
+
+
+def _pin_response(request, response):
+    if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+        response.set_cookie(
+            PIN_COOKIE, '1',
+            max_age=settings.DB_REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
+    return response
+
+
+@sync_and_async_middleware
+def replica_pin_middleware(get_response):
+    """Pins writes, and reads shortly after a client's write, to the primary."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _pin_request(request)
+            try:
+                response = await get_response(request)
+            finally:
+                _pinned.reset(token)
+            return _pin_response(request, response)
+    else:
+        def middleware(request):
+            token = _pin_request(request)
+            try:
+                response = get_response(request)
+            finally:
+                _pinned.reset(token)
+            return _pin_response(request, response)
+    return middleware
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 
 import os
 import logging.config
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -54,10 +55,12 @@ INSTALLED_APPS = [
     'orders.apps.OrdersConfig',
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig',
+    'notifications.apps.NotificationsConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'sport_shop_project.db_routers.replica_pin_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -85,6 +88,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'sport_shop_project.wsgi.application'
 
+# Serve the catalog pages and the product API list/detail endpoints from
+# async views. Only useful when running under ASGI (see asgi.py).
+ASYNC_CATALOG_VIEWS = os.getenv('ASYNC_CATALOG_VIEWS', 'False') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -99,9 +106,41 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT', '23242'),
+        # Reuse connections across requests instead of reconnecting each
+        # time; 0 closes them after every request. The MySQL backend has no
+        # built-in pool, so for a shared pool put ProxySQL or similar in
+        # front. Keep 0 under ASGI: connections are per thread there.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        # Ping a reused connection before the first query of a request, so a
+        # connection dropped by the server (wait_timeout) is replaced.
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+        },
     }
 }
 
+# Read replicas as "host[:port]", comma separated; they share the primary's
+# name and credentials. Catalog and review reads go to them, see
+# sport_shop_project/db_routers.py.
+DATABASE_REPLICAS = []
+for _index, _replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1):
+    _host, _, _port = _replica.strip().partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['sport_shop_project.db_routers.ReplicaRouter']
+
+# Reads stay on the primary for this long after a client's write.
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', '5'))
+# Seconds before a replica that failed its health check is tried again.
+DB_REPLICA_RETRY_SECONDS = int(os.getenv('DB_REPLICA_RETRY_SECONDS', '30'))
+
 
 #if DATABASE_URL.startswith('postgres://') or DATABASE_URL.startswith('postgresql://'):
 #     # Parse PostgreSQL URL
@@ -128,6 +167,73 @@ DATABASES = {
 #     # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# The catalog version (products/cache.py) that invalidates cached responses
+# lives here, so production needs a shared backend: with LocMemCache each
+# worker process sees only its own catalog writes (`check --deploy` warns).
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'sport-shop'),
+    }
+}
+
+# Sessions go through the cache only when it is shared by all workers; a
+# per-process LocMemCache would give each worker its own view of a session.
+# SESSION_ENGINE=users.sessions (needs a shared cache, checked at startup)
+# adds write-behind: the database row is refreshed at most once per
+# SESSION_DB_WRITE_INTERVAL seconds. SESSION_LOCAL_CACHE_TTL adds a
+# per-process tier on top of that; only enable it with sticky sessions.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE',
+    'django.contrib.sessions.backends.db'
+    if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache'
+    else 'django.contrib.sessions.backends.cached_db'
+)
+SESSION_DB_WRITE_INTERVAL = int(os.getenv('SESSION_DB_WRITE_INTERVAL', '60'))
+SESSION_LOCAL_CACHE_TTL = int(os.getenv('SESSION_LOCAL_CACHE_TTL', '0'))
+
+# Seconds an anonymous API list response stays cached (entries are also
+# invalidated by catalog version bumps).
+API_RESPONSE_CACHE_TIMEOUT = int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', '300'))
+
+# Short TTL for /api/v1/products/bulk/ and /availability/: stock changed
+# through queryset updates does not bump the catalog version.
+API_AVAILABILITY_CACHE_TIMEOUT = int(os.getenv('API_AVAILABILITY_CACHE_TIMEOUT', '30'))
+
+# The in-memory facet index (products/facets.py) is rebuilt after catalog
+# changes made by other processes, at most once per this many seconds.
+FACET_INDEX_REFRESH = int(os.getenv('FACET_INDEX_REFRESH', '30'))
+
+# Search suggestions (products/suggest.py): rebuilt after other processes'
+# catalog changes at most once per SUGGEST_INDEX_REFRESH seconds. With a
+# snapshot path, a fresh process loads the file written by
+# `manage.py build_suggest_snapshot` instead of querying the catalog.
+SUGGEST_INDEX_REFRESH = int(os.getenv('SUGGEST_INDEX_REFRESH', '300'))
+SUGGEST_SNAPSHOT_PATH = os.getenv('SUGGEST_SNAPSHOT_PATH', '')
+
+# Typo-tolerant search (products/trigrams.py): trigram matches are added when
+# the plain search finds fewer than SEARCH_FUZZY_MIN_RESULTS products (0 turns
+# it off), keeping those that share at least SEARCH_FUZZY_THRESHOLD of the
+# query's trigrams.
+SEARCH_FUZZY_MIN_RESULTS = int(os.getenv('SEARCH_FUZZY_MIN_RESULTS', '3'))
+SEARCH_FUZZY_THRESHOLD = float(os.getenv('SEARCH_FUZZY_THRESHOLD', '0.5'))
+
+# Trending ranking (products/trending.py). Event weights halve every
+# TRENDING_HALF_LIFE_HOURS. Stored scores grow by 2x per half-life after
+# TRENDING_EPOCH and stay within float range for ~1000 half-lives; changing
+# either value invalidates existing scores (reset them to 0). View and
+# add-to-cart points are buffered per process for TRENDING_FLUSH_SECONDS.
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '72'))
+TRENDING_EPOCH = os.getenv('TRENDING_EPOCH', '2026-01-01')
+TRENDING_FLUSH_SECONDS = int(os.getenv('TRENDING_FLUSH_SECONDS', '10'))
+
+# Product ids kept per session for the "Recently viewed" blocks.
+RECENTLY_VIEWED_LIMIT = int(os.getenv('RECENTLY_VIEWED_LIMIT', '8'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -188,6 +294,15 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@sportsshop.com')
 
+# Outbox delivery (python manage.py send_outbox): retries back off
+# exponentially from EMAIL_OUTBOX_RETRY_DELAY seconds.
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', '60'))
+
+# Order events (python manage.py dispatch_order_events): an event whose
+# handlers fail this many times stays unprocessed until retried in the admin.
+ORDER_EVENT_MAX_ATTEMPTS = int(os.getenv('ORDER_EVENT_MAX_ATTEMPTS', '5'))
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -197,14 +312,50 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        *(['api.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        *(['api.parsers.MessagePackParser'] if find_spec('msgpack') else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'api.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.AnonTokenBucketThrottle',
+        'api.throttling.UserTokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.getenv('API_THROTTLE_ANON', '120/min'),
+        'user': os.getenv('API_THROTTLE_USER', '600/min'),
+        'search': os.getenv('API_THROTTLE_SEARCH', '30/min'),
+        'cart_write': os.getenv('API_THROTTLE_CART_WRITE', '60/min'),
+        'review_write': os.getenv('API_THROTTLE_REVIEW_WRITE', '10/min'),
+        'token': os.getenv('API_THROTTLE_TOKEN', '10/min'),
+    },
+    # Number of reverse proxies in front of the app; client IPs are taken from X-Forwarded-For.
+    'NUM_PROXIES': int(os.environ['API_NUM_PROXIES']) if 'API_NUM_PROXIES' in os.environ else None,
 }
 
+# Token buckets for API throttling: LocalBucketStore keeps them in process
+# memory (single node), CacheBucketStore in the shared cache (several nodes).
+API_THROTTLE_STORE = os.getenv('API_THROTTLE_STORE', 'api.throttling.LocalBucketStore')
+
+# Signed API tokens (Authorization: Bearer <token>). Users behind a token are
+# cached per process for API_TOKEN_USER_CACHE_TTL seconds, so revocation and
+# user or profile changes can take that long to reach other workers.
+API_TOKEN_MAX_AGE = int(os.getenv('API_TOKEN_MAX_AGE', str(7 * 24 * 3600)))
+API_TOKEN_USER_CACHE_TTL = int(os.getenv('API_TOKEN_USER_CACHE_TTL', '60'))
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -0,0 +1,161 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from products.models import Product
+from reviews.models import Review
+from . import db_routers
+from .db_routers import PIN_COOKIE, ReplicaRouter, replica_pin_middleware, use_primary
+
+REPLICAS = ['replica_1', 'replica_2']
+
+
+class ReplicaTestMixin:
+    def setUp(self):
+        super().setUp()
+        self.router = ReplicaRouter()
+        self.available = set(REPLICAS)
+        patcher = mock.patch.object(db_routers, 'is_available', lambda alias: alias in self.available)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTests(ReplicaTestMixin, SimpleTestCase):
+    def test_catalog_reads_go_to_a_replica(self):
+        self.assertIn(self.router.db_for_read(Product), REPLICAS)
+        self.assertIn(self.router.db_for_read(Review), REPLICAS)
+
+    def test_other_reads_and_all_writes_go_to_the_primary(self):
+        self.assertEqual(self.router.db_for_read(User), 'default')
+        self.assertEqual(self.router.db_for_write(Product), 'default')
+        self.assertEqual(self.router.db_for_write(User), 'default')
+
+    def test_down_replica_is_skipped(self):
+        self.available = {'replica_2'}
+        self.assertEqual({self.router.db_for_read(Product) for _ in range(20)}, {'replica_2'})
+        self.available = set()
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_use_primary(self):
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+        self.assertIn(self.router.db_for_read(Product), REPLICAS)
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'products'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'products'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTransactionTests(ReplicaTestMixin, TestCase):
+    def test_reads_in_a_transaction_go_to_the_primary(self):
+        # TestCase wraps each test in an atomic block of its own.
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+
+class ReplicaHealthTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.up = False
+        self.checks = 0
+
+        def check(alias):
+            self.checks += 1
+            return self.up
+
+        for target, value in [
+            ('_check', check),
+            ('_health', {}),
+            ('time.monotonic', lambda: self.now),
+        ]:
+            patcher = mock.patch(f'{db_routers.__name__}.{target}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @override_settings(DB_REPLICA_RETRY_SECONDS=30)
+    def test_down_replica_is_retried_after_the_retry_interval(self):
+        self.assertFalse(db_routers.is_available('replica_1'))
+        self.up = True
+        self.now += 29
+        self.assertFalse(db_routers.is_available('replica_1'))
+        self.assertEqual(self.checks, 1)
+        self.now += 1
+        self.assertTrue(db_routers.is_available('replica_1'))
+        self.assertEqual(self.checks, 2)
+
+    def test_up_replica_is_rechecked_every_check_interval(self):
+        self.up = True
+        self.assertTrue(db_routers.is_available('replica_1'))
+        self.up = False
+        self.now += db_routers.CHECK_INTERVAL - 1
+        self.assertTrue(db_routers.is_available('replica_1'))
+        self.now += 1
+        self.assertFalse(db_routers.is_available('replica_1'))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, DB_REPLICA_PIN_SECONDS=5)
+class ReplicaPinMiddlewareTests(ReplicaTestMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = RequestFactory()
+        self.middleware = replica_pin_middleware(self.get_response)
+
+    def get_response(self, request):
+        response = HttpResponse()
+        response.read_from = self.router.db_for_read(Product)
+        return response
+
+    def test_safe_request_reads_from_a_replica(self):
+        response = self.middleware(self.factory.get('/products/'))
+        self.assertIn(response.read_from, REPLICAS)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_write_is_pinned_and_sets_the_pin_cookie(self):
+        response = self.middleware(self.factory.post('/orders/checkout/'))
+        self.assertEqual(response.read_from, 'default')
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertTrue(cookie['httponly'])
+        self.assertEqual(cookie['samesite'], 'Lax')
+
+    def test_reads_after_a_write_stick_to_the_primary(self):
+        request = self.factory.get('/orders/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        response = self.middleware(request)
+        self.assertEqual(response.read_from, 'default')
+        # Reads do not extend the pin.
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_expired_pin_cookie_reads_from_a_replica_again(self):
+        # The browser drops the cookie once its max-age is up.
+        self.middleware(self.factory.post('/orders/checkout/'))
+        response = self.middleware(self.factory.get('/orders/'))
+        self.assertIn(response.read_from, REPLICAS)
+
+    def test_pin_does_not_leak_past_the_request(self):
+        self.middleware(self.factory.post('/orders/checkout/'))
+        self.assertIn(self.router.db_for_read(Product), REPLICAS)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pin_cookie_without_replicas(self):
+        response = self.middleware(self.factory.post('/orders/checkout/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    async def test_async_write_is_pinned(self):
+        async def get_response(request):
+            return self.get_response(request)
+
+        middleware = replica_pin_middleware(get_response)
+        response = await middleware(AsyncRequestFactory().post('/orders/checkout/'))
+        self.assertEqual(response.read_from, 'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertIn(self.router.db_for_read(Product), REPLICAS)
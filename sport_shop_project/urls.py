@@ -10,10 +10,15 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 from products import views as products_views
+from products import async_views as products_async_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', products_views.home, name='home'),
+    path(
+        '',
+        products_async_views.home if settings.ASYNC_CATALOG_VIEWS else products_views.home,
+        name='home',
+    ),
     path('api-auth/', include('rest_framework.urls')),
 
     # App URLs
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+WRITE_BEHIND_ENGINE = 'users.sessions'
+LOCMEM_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches)
+def check_write_behind_cache(app_configs, **kwargs):
+    if settings.SESSION_ENGINE != WRITE_BEHIND_ENGINE:
+        return []
+    if settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND'] != LOCMEM_BACKEND:
+        return []
+    return [Warning(
+        'Write-behind sessions are stored in a per-process LocMemCache.',
+        hint=(
+            'Each worker would see its own copy of a session, and writes not '
+            'yet copied to the database are lost with the process. Configure '
+            'a shared cache (CACHE_BACKEND) or use '
+            'django.contrib.sessions.backends.cached_db.'
+        ),
+        obj=WRITE_BEHIND_ENGINE,
+        id='users.W001',
+    )]
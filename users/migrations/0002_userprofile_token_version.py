@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented to revoke all API tokens issued to the user'),
+        ),
+    ]
@@ -1,8 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
-from django.db.models.signals import post_save
-from django.dispatch import receiver
 import logging
 
 logger = logging.getLogger(__name__)
@@ -62,6 +60,10 @@ class UserProfile(models.Model):
     is_newsletter_subscriber = models.BooleanField(
         default=True
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        help_text='Incremented to revoke all API tokens issued to the user'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -83,14 +85,15 @@ class UserProfile(models.Model):
         return ', '.join(filter(None, parts))
 
 
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
-        logger.info(f"UserProfile created for user: {instance.username}")
-
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+def get_user_profile(user):
+    """
+    Returns ``user.profile``, creating it for accounts that predate the
+    profile signal. The profile is cached on the user instance, so repeated
+    reads within a request cost one query at most.
+    """
+    try:
+        return user.profile
+    except UserProfile.DoesNotExist:
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        user.profile = profile
+        return profile
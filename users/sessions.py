@@ -0,0 +1,152 @@
+"""
+Cached sessions with write-behind to the database.
+
+Reads come from an optional per-process tier, then the shared cache, then
+the database. Writes always go to the shared cache; the database row is
+refreshed at most once per ``SESSION_DB_WRITE_INTERVAL`` seconds per session
+(and per process), so a busy session costs no database write on most
+requests. Changes still pending when the cache entry is evicted are lost, so
+the interval bounds how much session state can be lost.
+
+The local tier (``SESSION_LOCAL_CACHE_TTL``) is off by default: another
+worker can change the session meanwhile, so only enable it with sticky
+sessions.
+"""
+import atexit
+import copy
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.base import UpdateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+LOCAL_MAX_SESSIONS = 10_000
+
+_lock = threading.Lock()
+# session_key -> (expires_at, data), oldest first
+_local = OrderedDict()
+# session_key -> monotonic time of the last database write, oldest first
+_last_db_write = OrderedDict()
+# session_key -> time the pending write is due, plus a heap ordered by it
+_pending = {}
+_pending_heap = []
+
+
+def _interval():
+    return settings.SESSION_DB_WRITE_INTERVAL
+
+
+def flush_pending(force=False):
+    """Writes sessions whose delayed database write is due (or all of them)."""
+    now = time.monotonic()
+    keys = []
+    with _lock:
+        while _pending_heap and (force or _pending_heap[0][0] <= now):
+            due, key = heapq.heappop(_pending_heap)
+            if _pending.get(key) == due:
+                del _pending[key]
+                _last_db_write[key] = now
+                _last_db_write.move_to_end(key)
+                keys.append(key)
+    for key in keys:
+        SessionStore(key).write_behind()
+
+
+atexit.register(flush_pending, force=True)
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'users.sessions'
+
+    def _get_local(self):
+        ttl = settings.SESSION_LOCAL_CACHE_TTL
+        if not ttl or self.session_key is None:
+            return None
+        entry = _local.get(self.session_key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return copy.deepcopy(entry[1])
+
+    def _set_local(self, data):
+        ttl = settings.SESSION_LOCAL_CACHE_TTL
+        if not ttl:
+            return
+        now = time.monotonic()
+        with _lock:
+            _local[self.session_key] = (now + ttl, copy.deepcopy(data))
+            _local.move_to_end(self.session_key)
+            while _local and (len(_local) > LOCAL_MAX_SESSIONS or next(iter(_local.values()))[0] < now):
+                _local.popitem(last=False)
+
+    def load(self):
+        data = self._get_local()
+        if data is None:
+            data = super().load()
+            if data:
+                self._set_local(data)
+        return data
+
+    def _db_write_due(self):
+        key = self.session_key
+        now = time.monotonic()
+        with _lock:
+            while _last_db_write and now - next(iter(_last_db_write.values())) >= _interval():
+                _last_db_write.popitem(last=False)
+            last = _last_db_write.get(key)
+            if last is None:
+                _last_db_write[key] = now
+                _pending.pop(key, None)
+                return True
+            if key not in _pending:
+                _pending[key] = last + _interval()
+                heapq.heappush(_pending_heap, (_pending[key], key))
+            return False
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        if must_create:
+            super().save(must_create=True)
+            with _lock:
+                _last_db_write[self.session_key] = time.monotonic()
+                _last_db_write.move_to_end(self.session_key)
+        else:
+            data = self._get_session()
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+            if self._db_write_due():
+                DBStore.save(self)
+        self._set_local(self._session)
+        flush_pending()
+
+    def write_behind(self):
+        data = self._cache.get(self.cache_key)
+        if data is None:
+            return
+        self._session_cache = data
+        try:
+            DBStore.save(self)
+        except UpdateError:
+            # Deleted in the meantime, e.g. by a logout on another worker.
+            pass
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        session_key = session_key or self.session_key
+        with _lock:
+            _local.pop(session_key, None)
+            _pending.pop(session_key, None)
+            _last_db_write.pop(session_key, None)
+
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create)
+
+    async def adelete(self, session_key=None):
+        return await sync_to_async(self.delete)(session_key)
@@ -1,7 +1,6 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
 from django.conf import settings
 from .models import UserProfile
 import logging
@@ -10,8 +9,11 @@ logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=User)
-def log_user_creation(sender, instance, created, **kwargs):
-    if created:
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    # Profile fields are saved through their own forms, so ordinary User
+    # saves (e.g. the last_login update on every login) don't touch it.
+    if created and not raw:
+        UserProfile.objects.create(user=instance)
         logger.info(f"New user created: {instance.username} ({instance.email})")
 
 
@@ -1,3 +1,60 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.checks import run_checks
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from .models import UserProfile, get_user_profile
 
-# Create your tests here.
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+class LoginQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw12345!')
+
+    def test_login_does_not_touch_profile(self):
+        # Auth, session existence check and insert, last_login, session
+        # update; the writes run in savepoints.
+        with CaptureQueriesContext(connection) as queries, self.assertNumQueries(9):
+            response = self.client.post(reverse('users:login'), {'username': 'alice', 'password': 'pw12345!'})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse([query for query in queries if 'user_profile' in query['sql']])
+
+    def test_user_save_does_not_save_profile(self):
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=['last_login'])
+
+    def test_get_user_profile_is_cached_on_the_user(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            profile = get_user_profile(user)
+            self.assertIs(get_user_profile(user), profile)
+
+    def test_get_user_profile_creates_missing_profile_once(self):
+        UserProfile.objects.filter(user=self.user).delete()
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(5):
+            profile = get_user_profile(user)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_profile(user), profile)
+        self.assertEqual(UserProfile.objects.filter(user=self.user).count(), 1)
+
+
+class WriteBehindSessionCheckTests(TestCase):
+    locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    shared = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}}
+
+    def check_ids(self):
+        return [message.id for message in run_checks()]
+
+    def test_write_behind_with_locmem_warns(self):
+        with override_settings(SESSION_ENGINE='users.sessions', CACHES=self.locmem):
+            self.assertIn('users.W001', self.check_ids())
+
+    def test_write_behind_with_shared_cache_passes(self):
+        with override_settings(SESSION_ENGINE='users.sessions', CACHES=self.shared):
+            self.assertNotIn('users.W001', self.check_ids())
+
+    def test_cached_db_with_locmem_passes(self):
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', CACHES=self.locmem):
+            self.assertNotIn('users.W001', self.check_ids())
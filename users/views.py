@@ -7,7 +7,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import UserProfile, get_user_profile
 from .forms import (
     UserRegistrationForm,
     UserProfileForm,
@@ -69,7 +69,7 @@ class UserProfileView(LoginRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['profile'] = self.request.user.profile
+        context['profile'] = get_user_profile(self.request.user)
         context['orders'] = self.request.user.orders.all()[:5]
         return context
 
@@ -81,10 +81,16 @@ class UserProfileEditView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy('users:profile')
 
     def get_object(self):
-        return self.request.user.profile
+        return get_user_profile(self.request.user)
 
     def form_valid(self, form):
-        response = super().form_valid(form)
+        if not form.has_changed():
+            messages.info(self.request, "No changes to save.")
+            return redirect(self.get_success_url())
+
+        self.object = form.save(commit=False)
+        self.object.save(update_fields=form.changed_data + ['updated_at'])
+        response = redirect(self.get_success_url())
         logger.info(f"Profile updated for user: {self.request.user.username}")
         messages.success(self.request, "Profile updated successfully!")
         return response
@@ -108,7 +114,7 @@ class UserEditView(LoginRequiredMixin, UpdateView):
 
 @login_required(login_url='users:login')
 def profile(request):
-    profile_obj = request.user.profile
+    profile_obj = get_user_profile(request.user)
     context = {
         'user': request.user,
         'profile': profile_obj,